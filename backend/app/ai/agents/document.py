@@ -4,35 +4,53 @@ from typing import Any, Dict, List, Optional
 
 from app.ai.client import chat_completion
 from app.ai.prompts.document import build_document_prompt
+from app.ai.tokens import generation_context_tokens
 from app.schemas.document import QUESTION_GENERATION_SCHEMA, QuestionType
 from app.utils.json import parse_json_strict, validate_or_raise
 
 
+def _parse(raw: str) -> Dict[str, Any]:
+    data = parse_json_strict(raw)
+    validate_or_raise(data, QUESTION_GENERATION_SCHEMA)
+    return data
+
+
 class DocumentAgent:
+    name = "document"
+
     def run(
         self,
         *,
         context_chunks: List[str],
         count: int,
         question_type: QuestionType,
+        avoid: Optional[List[str]] = None,
         max_retries: int = 2,
     ) -> List[Dict[str, Any]]:
         messages = build_document_prompt(
             context_chunks=context_chunks,
             count=count,
             question_type=question_type,
+            context_tokens=generation_context_tokens(self.name, count),
+            avoid=avoid,
         )
 
         last_error: Optional[str] = None
 
-        for _ in range(max_retries + 1):
-            raw = chat_completion(messages, temperature=0.2)
+        for attempt in range(max_retries + 1):
+            raw = chat_completion(
+                messages,
+                temperature=0.2,
+                agent=self.name,
+                size=count,
+                escalate=attempt > 0,
+                validate=_parse,
+            )
 
             try:
-                data = parse_json_strict(raw)
-                validate_or_raise(data, QUESTION_GENERATION_SCHEMA)
+                data = _parse(raw)
                 return data["questions"]
-            except Exception as e:
+            except (ValueError, KeyError) as e:
                 last_error = str(e)
                 messages.append(
                     {
@@ -2,18 +2,108 @@ from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from app.ai.client import chat_completion
-from app.ai.prompts.refinement import build_refinement_prompt
-from app.schemas.refinement import QUESTION_REFINEMENT_SCHEMA
+from app.ai.prompts.refinement import (
+    build_refinement_patch_prompt,
+    build_refinement_prompt,
+)
+from app.core.config import settings
+from app.core.logger import logger
+from app.schemas.refinement import (
+    QUESTION_REFINEMENT_PATCH_SCHEMA,
+    QUESTION_REFINEMENT_SCHEMA,
+)
 from app.utils.json import parse_json_strict, validate_or_raise
 
 
+def _parse(raw: str) -> Dict[str, Any]:
+    data = parse_json_strict(raw)
+    validate_or_raise(data, QUESTION_REFINEMENT_SCHEMA)
+    return data
+
+
+def _parse_patch(raw: str) -> Dict[str, Any]:
+    data = parse_json_strict(raw)
+    validate_or_raise(data, QUESTION_REFINEMENT_PATCH_SCHEMA)
+    return data
+
+
+def apply_question_patch(
+    current_question: Dict[str, Any], patch: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Merges a patch into the current question and validates the result
+    against QUESTION_REFINEMENT_SCHEMA. Option letters merge individually.
+    """
+    merged = {
+        "question_type": current_question.get("question_type"),
+        "question_text": current_question.get("question_text"),
+        "options": current_question.get("options"),
+        "correct_answer": current_question.get("correct_answer"),
+        "explanation": current_question.get("explanation"),
+        "tags": current_question.get("tags"),
+        "confidence_score": current_question.get("confidence_score"),
+    }
+    for field, value in patch.items():
+        if field == "options" and isinstance(value, dict):
+            merged["options"] = {**(merged["options"] or {}), **value}
+        else:
+            merged[field] = value
+
+    validate_or_raise({"question": merged}, QUESTION_REFINEMENT_SCHEMA)
+    return merged
+
+
 class RefinementAgent:
+    name = "refinement"
+
     def run(
         self,
         *,
         instruction: str,
         current_question: Dict[str, Any],
         max_retries: int = 2,
+    ) -> Dict[str, Any]:
+        escalate = False
+        if settings.REFINEMENT_PATCH_MODE:
+            try:
+                return self.run_patch(
+                    instruction=instruction, current_question=current_question
+                )
+            except (ValueError, KeyError) as e:
+                # Only an invalid patch falls back; provider errors propagate.
+                logger.warning(f"Refinement patch rejected, regenerating: {e}")
+                escalate = True
+
+        return self.run_full(
+            instruction=instruction,
+            current_question=current_question,
+            max_retries=max_retries,
+            escalate=escalate,
+        )
+
+    def run_patch(
+        self,
+        *,
+        instruction: str,
+        current_question: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        messages = build_refinement_patch_prompt(
+            instruction=instruction,
+            current_question=current_question,
+        )
+        raw = chat_completion(
+            messages, temperature=0.2, agent=self.name, size=1, validate=_parse_patch
+        )
+        data = _parse_patch(raw)
+        return apply_question_patch(current_question, data["patch"])
+
+    def run_full(
+        self,
+        *,
+        instruction: str,
+        current_question: Dict[str, Any],
+        max_retries: int = 2,
+        escalate: bool = False,
     ) -> Dict[str, Any]:
         messages = build_refinement_prompt(
             instruction=instruction,
@@ -22,14 +112,20 @@ class RefinementAgent:
 
         last_error: Optional[str] = None
 
-        for _ in range(max_retries + 1):
-            raw = chat_completion(messages, temperature=0.2)
+        for attempt in range(max_retries + 1):
+            raw = chat_completion(
+                messages,
+                temperature=0.2,
+                agent=self.name,
+                size=1,
+                escalate=escalate or attempt > 0,
+                validate=_parse,
+            )
 
             try:
-                data = parse_json_strict(raw)
-                validate_or_raise(data, QUESTION_REFINEMENT_SCHEMA)
+                data = _parse(raw)
                 return data["question"]
-            except Exception as e:
+            except (ValueError, KeyError) as e:
                 last_error = str(e)
                 messages.append(
                     {
@@ -1,17 +1,26 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from app.ai.client import chat_completion
 from app.ai.prompts.similar import build_similar_prompt
 from app.schemas.similar import SIMILAR_DIRECT_SCHEMA, Difficulty
 from app.utils.json import parse_json_strict, validate_or_raise
 
 
+def _parse(raw: str) -> Dict[str, Any]:
+    data = parse_json_strict(raw)
+    validate_or_raise(data, SIMILAR_DIRECT_SCHEMA)
+    return data
+
+
 class SimilarAgent:
+    name = "similar"
+
     def run(
         self,
         instruction: str,
         difficulty: Difficulty,
         quantity: int,
         data_url: str,
+        avoid: Optional[List[str]] = None,
         max_retries: int = 2,
     ):
         messages = build_similar_prompt(
@@ -19,18 +28,25 @@ class SimilarAgent:
             difficulty=difficulty,
             count=quantity,
             data_url=data_url,
+            avoid=avoid,
         )
 
         last_error: Optional[str] = None
 
-        for _ in range(max_retries + 1):
-            raw = chat_completion(messages, temperature=0.2)
+        for attempt in range(max_retries + 1):
+            raw = chat_completion(
+                messages,
+                temperature=0.2,
+                agent=self.name,
+                size=quantity,
+                escalate=attempt > 0,
+                validate=_parse,
+            )
 
             try:
-                data = parse_json_strict(raw)
-                validate_or_raise(data, SIMILAR_DIRECT_SCHEMA)
+                data = _parse(raw)
                 return data["questions"]
-            except Exception as e:
+            except (ValueError, KeyError) as e:
                 last_error = str(e)
                 messages.append(
                     {
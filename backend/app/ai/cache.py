@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Optional
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.utils.sqlite import connect_local_db
+
+
+def completion_cache_key(
+    *,
+    model: str,
+    messages: Any,
+    temperature: float,
+    response_format: Optional[Any] = None,
+) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": response_format,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Two-tier cache for chat completions: an in-process LRU (bounded by entry
+    count and TTL) in front of a SQLite file shared by every worker on the host.
+    The persistent tier is trimmed by TTL and total payload size on write.
+    """
+
+    def __init__(
+        self,
+        *,
+        path: str,
+        ttl_seconds: int,
+        max_bytes: int,
+        memory_entries: int,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._memory: TTLCache = TTLCache(maxsize=memory_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_local_db(self.path)
+            conn.execute(
+                """
+                create table if not exists llm_cache (
+                  key text primary key,
+                  value text not null,
+                  size int not null,
+                  created_at real not null,
+                  accessed_at real not null
+                )
+                """
+            )
+            conn.execute(
+                "create index if not exists llm_cache_accessed_at_idx "
+                "on llm_cache(accessed_at)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._memory.get(key)
+        if value is not None:
+            return value
+
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "select value, created_at from llm_cache where key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("delete from llm_cache where key = ?", (key,))
+                return None
+            conn.execute(
+                "update llm_cache set accessed_at = ? where key = ?", (now, key)
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+        with self._lock:
+            self._memory[key] = value
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._memory[key] = value
+
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        try:
+            conn = self._conn()
+            conn.execute("begin immediate")
+            try:
+                conn.execute(
+                    "insert or replace into llm_cache "
+                    "(key, value, size, created_at, accessed_at) values (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now),
+                )
+                conn.execute(
+                    "delete from llm_cache where created_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+                self._evict_to_size(conn)
+                conn.execute("commit")
+            except Exception:
+                conn.execute("rollback")
+                raise
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict_to_size(self, conn) -> None:
+        (total,) = conn.execute("select coalesce(sum(size), 0) from llm_cache").fetchone()
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under the limit.
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in conn.execute(
+            "select key, size from llm_cache order by accessed_at asc"
+        ):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("delete from llm_cache where key = ?", doomed)
+
+
+completion_cache = CompletionCache(
+    path=settings.LLM_CACHE_PATH,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+)
+
+
+def cache_allowed(agent: Optional[str]) -> bool:
+    return bool(
+        settings.LLM_CACHE_ENABLED and agent and agent in settings.LLM_CACHE_AGENTS
+    )
@@ -1,43 +1,261 @@
-from openai.types.chat import ChatCompletionMessageParam
-from typing import List
-from openai import OpenAI
+from __future__ import annotations
+
+import time
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional
+
+from app.ai.cache import cache_allowed, completion_cache, completion_cache_key
+from app.ai.hedging import CancelToken, HedgeCancelled, LatencyTracker, run_hedged
+from app.ai.scheduler import llm_scheduler, priority_for
 from app.core.config import settings
+from app.core.logger import logger
+from app.core.resilience import Dependency
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openai.types import CompletionUsage
+    from openai.types.chat import ChatCompletionMessageParam
+
+latency_tracker = LatencyTracker()
+
+
+def _openrouter_transient(e: BaseException) -> bool:
+    # 429s are retried by the scheduler and do not mean the provider is down.
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(e, APIConnectionError):
+        return True
+    return isinstance(e, APIStatusError) and (
+        e.status_code >= 500 or e.status_code == 408
+    )
 
 
+openrouter = Dependency("openrouter", is_transient=_openrouter_transient)
+
+
+@lru_cache(maxsize=1)
 def get_ai_client() -> OpenAI:
+    """
+    One pooled client per process. Rate-limit retries are owned by the
+    scheduler, so the SDK's own retry loop is disabled.
+    """
+    from openai import OpenAI
+
     if not settings.OPENROUTER_BASE_URL or not settings.OPENROUTER_API_KEY:
         raise RuntimeError("OPENROUTER_BASE_URL and OPENROUTER_API_KEY must be set.")
     return OpenAI(
         base_url=settings.OPENROUTER_BASE_URL,
         api_key=settings.OPENROUTER_API_KEY,
+        max_retries=0,
     )
 
 
-def create_embeddings(input: List[str] | str) -> List[List[float]]:
+def create_embeddings(
+    input: List[str] | str, *, agent: str = "embedding"
+) -> List[List[float]]:
     model = settings.EMBEDDING_MODEL
     if not model:
         raise RuntimeError("EMBEDDING_MODEL must be set.")
 
     client = get_ai_client()
-    resp = client.embeddings.create(
-        model=model,
-        input=input,
-        encoding_format="float",
+    extra: Dict[str, Any] = {}
+    if settings.EMBEDDING_SEND_DIMENSIONS:
+        extra["dimensions"] = settings.EMBEDDING_DIM
+    raw = openrouter.call(
+        lambda: llm_scheduler.run(
+            lambda: client.embeddings.with_raw_response.create(
+                model=model,
+                input=input,
+                encoding_format="float",
+                **extra,
+            ),
+            priority=priority_for(agent),
+        )
     )
+    resp = raw.parse()
     return [item.embedding for item in resp.data]
 
 
+@dataclass
+class _StreamedCompletion:
+    content: str
+    usage: Optional[CompletionUsage]
+    headers: Mapping[str, str]
+
+
+def _log_usage(agent: Optional[str], model: str, usage: Optional[CompletionUsage]):
+    if usage is None:
+        return
+    details = usage.prompt_tokens_details
+    cached = (details.cached_tokens if details else None) or 0
+    logger.info(
+        f"chat_completion agent={agent} model={model} "
+        f"prompt_tokens={usage.prompt_tokens} cached_tokens={cached} "
+        f"completion_tokens={usage.completion_tokens}"
+    )
+
+
+def select_model(
+    agent: Optional[str], size: Optional[int] = None, escalate: bool = False
+) -> str:
+    if not escalate and settings.QUEST_FAST_MODEL and size is not None:
+        limit = settings.LLM_FAST_TIER_MAX_SIZE.get(agent or "")
+        if limit is not None and size <= limit:
+            return settings.QUEST_FAST_MODEL
+    return settings.QUEST_MODEL
+
+
 def chat_completion(
-    messages: List[ChatCompletionMessageParam], temperature: float = 0.2
+    messages: List[ChatCompletionMessageParam],
+    temperature: float = 0.2,
+    *,
+    agent: Optional[str] = None,
+    size: Optional[int] = None,
+    escalate: bool = False,
+    response_format: Optional[Dict[str, Any]] = None,
+    validate: Optional[Callable[[str], Any]] = None,
 ) -> str:
-    model = settings.QUEST_MODEL
+    """
+    `agent` selects the caching, routing and latency policy; `size` and
+    `escalate` pick the model tier. When `validate` is given, a response is
+    only written to the cache if it passes, so a malformed answer is never
+    replayed to the next identical request.
+    """
+    model = select_model(agent, size=size, escalate=escalate)
     if not model:
         raise RuntimeError("CHAT_MODEL must be set.")
 
+    use_cache = cache_allowed(agent)
+    key = None
+    if use_cache:
+        key = completion_cache_key(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            response_format=response_format,
+        )
+        cached = completion_cache.get(key)
+        if cached is not None:
+            logger.info(f"chat_completion agent={agent} model={model} cache_hit=True")
+            return cached
+
+    budget = settings.LLM_LATENCY_BUDGETS.get(
+        agent or "", settings.LLM_DEFAULT_LATENCY_BUDGET
+    )
     client = get_ai_client()
-    resp = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
+    extra: Dict[str, Any] = {}
+    if response_format is not None:
+        extra["response_format"] = response_format
+
+    def attempt(model_name: str) -> str:
+        started = time.perf_counter()
+
+        def send():
+            # Transport retries share the call's latency budget.
+            remaining = max(1.0, budget - (time.perf_counter() - started))
+            return llm_scheduler.run(
+                lambda: client.chat.completions.with_raw_response.create(
+                    model=model_name,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=remaining,
+                    **extra,
+                ),
+                priority=priority_for(agent),
+            )
+
+        raw = openrouter.call(send, deadline=budget)
+        resp = raw.parse()
+        latency_tracker.record(f"{agent}:{model_name}", time.perf_counter() - started)
+        _log_usage(agent, model_name, resp.usage)
+        return resp.choices[0].message.content or ""
+
+    def hedged_attempt(model_name: str, token: CancelToken) -> str:
+        """
+        Streams the completion so a losing attempt can be stopped mid-flight:
+        the token closes the HTTP response, which releases the scheduler slot
+        and drops the connection (providers that support it stop generating).
+        """
+        started = time.perf_counter()
+
+        def consume() -> _StreamedCompletion:
+            token.raise_if_cancelled()
+            remaining = max(1.0, budget - (time.perf_counter() - started))
+            stream = client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                timeout=remaining,
+                stream=True,
+                stream_options={"include_usage": True},
+                **extra,
+            )
+            token.on_cancel(stream.close)
+            parts: List[str] = []
+            usage = None
+            try:
+                for chunk in stream:
+                    token.raise_if_cancelled()
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+            except HedgeCancelled:
+                raise
+            except Exception:
+                # Reading a response closed by the winner fails in httpx.
+                token.raise_if_cancelled()
+                raise
+            finally:
+                stream.close()
+            return _StreamedCompletion(
+                content="".join(parts), usage=usage, headers=stream.response.headers
+            )
+
+        result = openrouter.call(
+            lambda: llm_scheduler.run(consume, priority=priority_for(agent)),
+            deadline=budget,
+        )
+        latency_tracker.record(f"{agent}:{model_name}", time.perf_counter() - started)
+        _log_usage(agent, model_name, result.usage)
+        return result.content
+
+    start = time.perf_counter()
+    p95 = (
+        latency_tracker.p95(f"{agent}:{model}", settings.LLM_HEDGE_MIN_SAMPLES)
+        if agent in settings.LLM_HEDGE_AGENTS
+        else None
     )
-    return resp.choices[0].message.content or ""
+    if p95 is not None:
+        hedge_model = settings.QUEST_FALLBACK_MODEL or model
+        content = run_hedged(
+            [
+                lambda token: hedged_attempt(model, token),
+                lambda token: hedged_attempt(hedge_model, token),
+            ],
+            hedge_after=max(p95, settings.LLM_HEDGE_MIN_DELAY_SECONDS),
+            deadline=budget,
+            validate=validate,
+        )
+    else:
+        content = attempt(model)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    logger.info(
+        f"chat_completion agent={agent} model={model} cache_hit=False "
+        f"hedged={p95 is not None} time={elapsed_ms}ms"
+    )
+
+    if key is not None and content:
+        try:
+            if validate is not None:
+                validate(content)
+        except (ValueError, KeyError):
+            # Left for the caller's repair loop; never cached.
+            return content
+        try:
+            completion_cache.set(key, content)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed for agent={agent}: {e}")
+
+    return content
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Sequence
+
+from cachetools import LRUCache
+
+from app.ai.embeddings import embed_texts
+from app.core.config import settings
+from app.core.logger import logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Question embeddings keyed by (model, size, text hash). A text always embeds
+# to the same vector, so entries never go stale; existing questions of a
+# session are embedded once and reused by every later batch.
+_embedding_cache: LRUCache = LRUCache(
+    maxsize=settings.QUESTION_EMBEDDING_CACHE_MAX_ENTRIES
+)
+_embedding_cache_lock = threading.Lock()
+
+
+def _cache_key(text: str) -> tuple[str, int, str]:
+    normalized = " ".join(text.lower().split())
+    return (
+        settings.EMBEDDING_MODEL,
+        settings.EMBEDDING_DIM,
+        hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+    )
+
+
+def embed_questions(texts: Sequence[str]) -> np.ndarray:
+    """Unit-normalized embeddings, one row per text; misses are embedded in one batch."""
+    import numpy as np
+
+    keys = [_cache_key(t) for t in texts]
+    with _embedding_cache_lock:
+        vectors = [_embedding_cache.get(k) for k in keys]
+
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        fresh = np.asarray(embed_texts([texts[i] for i in missing]), dtype=np.float32)
+        norms = np.linalg.norm(fresh, axis=1, keepdims=True)
+        fresh /= np.maximum(norms, 1e-12)
+        with _embedding_cache_lock:
+            for i, vec in zip(missing, fresh):
+                _embedding_cache[keys[i]] = vec
+                vectors[i] = vec
+
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.vstack(vectors)
+
+
+def duplicate_mask(
+    candidates: Sequence[str],
+    existing: Sequence[str],
+    threshold: float,
+) -> np.ndarray:
+    """
+    Boolean mask over `candidates`: True where a candidate is a near-duplicate
+    of an existing question or of an earlier candidate in the same batch.
+    """
+    import numpy as np
+
+    if not candidates:
+        return np.zeros(0, dtype=bool)
+
+    vectors = embed_questions([*candidates, *existing])
+    cand = vectors[: len(candidates)]
+    prior = vectors[len(candidates) :]
+
+    # Within the batch only earlier candidates count, so the first of a group
+    # of near-identical questions survives.
+    within = np.triu(cand @ cand.T, k=1)
+    mask = (within >= threshold).any(axis=0)
+    if len(prior):
+        mask |= (cand @ prior.T).max(axis=1) >= threshold
+    return mask
+
+
+def generate_unique(
+    generate: Callable[[int, List[str]], List[Dict[str, Any]]],
+    count: int,
+    existing: Sequence[str],
+) -> List[Dict[str, Any]]:
+    """
+    Calls generate(count, avoid) and drops near-duplicates. Freed slots are
+    regenerated, with the texts to avoid, for up to
+    QUESTION_DEDUP_REGENERATE_ROUNDS rounds; what is still missing after that
+    is left out rather than stored twice.
+    """
+    questions = generate(count, [])
+    if not settings.QUESTION_DEDUP_ENABLED or not questions:
+        return questions
+
+    kept: List[Dict[str, Any]] = []
+    known = list(existing)
+    rounds = 0
+    while True:
+        texts = [q["question_text"] for q in questions]
+        mask = duplicate_mask(texts, known, settings.QUESTION_DEDUP_THRESHOLD)
+        for q, is_dup in zip(questions, mask):
+            if not is_dup:
+                kept.append(q)
+                known.append(q["question_text"])
+
+        missing = count - len(kept)
+        if missing <= 0 or rounds >= settings.QUESTION_DEDUP_REGENERATE_ROUNDS:
+            break
+        rounds += 1
+        logger.info(f"Regenerating {missing} near-duplicate question(s)")
+        questions = generate(missing, known)
+        if not questions:
+            break
+
+    if len(kept) < count:
+        logger.warning(
+            f"Dropped {count - len(kept)} near-duplicate question(s) of {count}"
+        )
+    return kept[:count]
@@ -1,7 +1,23 @@
+import math
+import threading
 from typing import List
+
+from cachetools import LRUCache
+
 from app.ai.client import create_embeddings
 from app.core.config import settings
 
+# Search and retrieval queries repeat a lot; their embeddings never change for
+# a given model and size.
+_query_cache: LRUCache = LRUCache(maxsize=settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES)
+_query_cache_lock = threading.Lock()
+
+
+def _truncate(emb: List[float], dim: int) -> List[float]:
+    head = emb[:dim]
+    norm = math.sqrt(sum(x * x for x in head)) or 1.0
+    return [x / norm for x in head]
+
 
 def embed_texts(texts: List[str], batch_size: int = 64) -> List[List[float]]:
     clean = [(t or "").strip() for t in texts]
@@ -13,18 +29,33 @@ def embed_texts(texts: List[str], batch_size: int = 64) -> List[List[float]]:
         batch = clean[i : i + batch_size]
         out.extend(create_embeddings(batch))
 
-    expected_dim = getattr(settings, "EMBEDDING_DIM", None)
-    if expected_dim:
-        expected = int(expected_dim)
-        for emb in out:
-            if len(emb) != expected:
-                raise RuntimeError(
-                    f"Embedding dimension mismatch. Expected {expected}, got {len(emb)}. "
-                    f"Model={settings.EMBEDDING_MODEL}"
-                )
+    expected = settings.EMBEDDING_DIM
+    for i, emb in enumerate(out):
+        if len(emb) > expected:
+            # The provider ignored `dimensions`; for Matryoshka models a
+            # truncated, re-normalized vector is what it would have returned.
+            out[i] = _truncate(emb, expected)
+        elif len(emb) < expected:
+            raise RuntimeError(
+                f"Embedding dimension mismatch. Expected {expected}, got {len(emb)}. "
+                f"Model={settings.EMBEDDING_MODEL}"
+            )
 
     return out
 
 
 def embed_query(text: str) -> List[float]:
-    return embed_texts([text], batch_size=1)[0]
+    key = (
+        settings.EMBEDDING_MODEL,
+        settings.EMBEDDING_DIM,
+        " ".join(text.lower().split()),
+    )
+    with _query_cache_lock:
+        cached = _query_cache.get(key)
+    if cached is not None:
+        return cached
+
+    emb = embed_texts([text], batch_size=1)[0]
+    with _query_cache_lock:
+        _query_cache[key] = emb
+    return emb
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+
+class LatencyTracker:
+    """Rolling per-agent latency window used to pick hedge delays."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=window)
+        )
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[agent].append(seconds)
+
+    def p95(self, agent: str, min_samples: int) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(agent, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[int(len(samples) * 0.95)]
+
+
+class HedgeCancelled(Exception):
+    """Raised inside an attempt that lost the race."""
+
+
+class CancelToken:
+    """
+    Handed to each hedged attempt. When another attempt wins, cancel() sets
+    the flag and runs the closers the attempt registered (e.g. closing its
+    HTTP response), so a loser stops reading, frees its scheduler slot and
+    drops the provider connection instead of running to its timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._closers: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled:
+            raise HedgeCancelled()
+
+    def on_cancel(self, close: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._cancelled:
+                self._closers.append(close)
+                return
+        close()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            closers, self._closers = self._closers, []
+        for close in closers:
+            try:
+                close()
+            except Exception:
+                pass
+
+
+_hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+def run_hedged(
+    attempts: List[Callable[[CancelToken], str]],
+    *,
+    hedge_after: float,
+    deadline: float,
+    validate: Optional[Callable[[str], Any]] = None,
+) -> str:
+    """
+    Starts attempts[0]; if it has not produced a valid answer after
+    `hedge_after` seconds (or fails outright), starts the next attempt. The
+    first valid response wins and the others are cancelled: queued ones never
+    start, in-flight ones have their CancelToken fired.
+
+    If nothing valid arrives, the last invalid response is returned so the
+    caller's repair loop can handle it; if every attempt raised, the last
+    error is re-raised.
+    """
+    start = time.monotonic()
+    pending: Dict[Future, CancelToken] = {}
+    next_attempt = 0
+    invalid: Optional[str] = None
+    last_error: Optional[BaseException] = None
+
+    def launch() -> None:
+        nonlocal next_attempt
+        token = CancelToken()
+        pending[_hedge_pool.submit(attempts[next_attempt], token)] = token
+        next_attempt += 1
+
+    launch()
+    try:
+        while pending:
+            elapsed = time.monotonic() - start
+            remaining = deadline - elapsed
+            if remaining <= 0:
+                raise TimeoutError(f"LLM call exceeded its {deadline}s budget")
+
+            can_hedge = next_attempt < len(attempts)
+            timeout = min(remaining, max(0.0, hedge_after - elapsed)) if can_hedge else remaining
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.pop(future)
+                try:
+                    content = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if validate is None:
+                    return content
+                try:
+                    validate(content)
+                    return content
+                except Exception:
+                    invalid = content
+
+            hedge_due = time.monotonic() - start >= hedge_after
+            if can_hedge and (hedge_due or not pending):
+                launch()
+    finally:
+        for future, token in pending.items():
+            future.cancel()
+            token.cancel()
+
+    if invalid is not None:
+        return invalid
+    assert last_error is not None
+    raise last_error
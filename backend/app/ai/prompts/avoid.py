@@ -0,0 +1,18 @@
+from typing import List, Optional
+
+from app.ai.tokens import truncate_to_tokens
+
+# Upper bound on the ALREADY ASKED block so a long session cannot crowd out
+# the rest of the prompt.
+AVOID_MAX_TOKENS = 2000
+
+
+def build_avoid_block(avoid: Optional[List[str]]) -> str:
+    """Lists questions the model must not repeat; most recent first."""
+    if not avoid:
+        return ""
+    lines = "\n".join(f"- {' '.join(t.split())}" for t in reversed(avoid))
+    lines = truncate_to_tokens(lines, AVOID_MAX_TOKENS)
+    return (
+        "\nALREADY ASKED (do NOT repeat or paraphrase any of these):\n" + lines
+    )
@@ -1,15 +1,17 @@
-from typing import Dict, List
+from __future__ import annotations
 
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from app.ai.prompts.avoid import build_avoid_block
+from app.ai.tokens import count_tokens, fit_chunks
 from app.schemas.document import QuestionType
-from openai.types.chat import ChatCompletionMessageParam
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
 
-def build_document_prompt(
-    context_chunks: List[str],
-    count: int,
-    question_type: QuestionType,
-) -> List[ChatCompletionMessageParam]:
-    system = f"""
+# Static and byte-identical across requests so providers can reuse the cached
+# prefix. Everything request-specific goes in the user message, after it.
+DOCUMENT_SYSTEM_PROMPT = """
 You are an educational content generator for teachers.
 
 CRITICAL OUTPUT RULES:
@@ -24,26 +26,16 @@ QUALITY RULES:
 - Questions must match the requested difficulty.
 - Ensure the correct answer is actually correct based on the STUDY TEXT.
 - Explanations must justify why the answer is correct (and for MCQ, why distractors are wrong).
-""".strip()
-
-    study_text = "\n\n---\n\n".join(context_chunks)
-
-    user = f"""
-TASK:
-Generate exactly {count} questions from the STUDY TEXT.
-
-PARAMETERS:
-- question_type: {question_type}  (mcq OR open-ended)
 
 OUTPUT JSON SHAPE (STRICT):
-{{
+{
   "questions": [
-    {{
+    {
       "question_type": "mcq" | "open",
       "question_text": "string",
 
       "options": 
-        - if question_type == "mcq": {{"A":"string","B":"string","C":"string","D":"string"}}
+        - if question_type == "mcq": {"A":"string","B":"string","C":"string","D":"string"}
         - if question_type == "open": null
     
       "correct_answer": 
@@ -54,9 +46,9 @@ OUTPUT JSON SHAPE (STRICT):
 
       "tags": object OR null,
       "confidence_score": number(0..1) OR null
-    }}
+    }
   ]
-}}
+}
 
 ADDITIONAL CONSTRAINTS:
 - If question_type is "mcq":
@@ -67,12 +59,49 @@ ADDITIONAL CONSTRAINTS:
   - options MUST be null
   - correct_answer MUST be a short text answer (not a paragraph)
 - Explanation MUST be detailed and step-by-step for BOTH types.
+""".strip()
 
+# Reserved for the TASK block that follows the study text.
+_TASK_OVERHEAD_TOKENS = 200
+
+
+def build_document_prompt(
+    context_chunks: List[str],
+    count: int,
+    question_type: QuestionType,
+    context_tokens: Optional[int] = None,
+    avoid: Optional[List[str]] = None,
+) -> List[ChatCompletionMessageParam]:
+    """
+    `context_tokens` is the prompt budget for this call; retrieved chunks are
+    kept in relevance order until it is spent. `avoid` lists questions that
+    must not be generated again.
+    """
+    avoid_block = build_avoid_block(avoid)
+    if context_tokens is not None:
+        available = (
+            context_tokens
+            - count_tokens(DOCUMENT_SYSTEM_PROMPT)
+            - count_tokens(avoid_block)
+            - _TASK_OVERHEAD_TOKENS
+        )
+        context_chunks = fit_chunks(context_chunks, max(available, 0))
+
+    study_text = "\n\n---\n\n".join(context_chunks)
+
+    user = f"""
 STUDY TEXT:
 {study_text}
+
+TASK:
+Generate exactly {count} questions from the STUDY TEXT.
+
+PARAMETERS:
+- question_type: {question_type}  (mcq OR open-ended)
+{avoid_block}
 """.strip()
 
     return [
-        {"role": "system", "content": system},
+        {"role": "system", "content": DOCUMENT_SYSTEM_PROMPT},
         {"role": "user", "content": user},
     ]
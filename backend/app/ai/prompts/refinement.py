@@ -1,43 +1,34 @@
-from typing import Dict, List, Any
-
-from app.schemas.document import QuestionType
-from openai.types.chat import ChatCompletionMessageParam
+from __future__ import annotations
 
+import json
+from typing import TYPE_CHECKING, Dict, List, Any
 
-def build_refinement_prompt(
-    instruction: str,
-    current_question: Dict[str, Any],
-) -> List[ChatCompletionMessageParam]:
-    system = (
-        "You are a Canvas Editor.\n"
-        "You edit an EXISTING educational question based on a teacher's instruction.\n"
-        "You MUST return ONLY valid JSON (no markdown, no commentary).\n"
-        "You MUST preserve correctness and internal consistency.\n"
-        "Never add extra keys outside the required JSON shape.\n"
-    )
-
-    user = f"""
-INSTRUCTION:
-{instruction}
+from app.schemas.document import QuestionType
 
-CURRENT QUESTION (the only source of truth, JSON):
-{current_question}
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
 
-TASK:
-Apply the instruction to produce an updated question.
+# System prompts are static and byte-identical across requests so providers
+# can reuse the cached prefix. The question and instruction follow them.
+REFINEMENT_SYSTEM_PROMPT = """
+You are a Canvas Editor.
+You edit an EXISTING educational question based on a teacher's instruction.
+You MUST return ONLY valid JSON (no markdown, no commentary).
+You MUST preserve correctness and internal consistency.
+Never add extra keys outside the required JSON shape.
 
 OUTPUT FORMAT (STRICT JSON ONLY):
-{{
-  "question": {{
+{
+  "question": {
     "question_type": "mcq" | "open",
     "question_text": "string",
-    "options": {{"A":"string","B":"string","C":"string","D":"string"}} OR null,
+    "options": {"A":"string","B":"string","C":"string","D":"string"} OR null,
     "correct_answer": "A"|"B"|"C"|"D" (if mcq) OR "string" (if open),
     "explanation": "string",
     "tags": null,
     "confidence_score": null
-  }}
-}}
+  }
+}
 
 RULES:
 - Do NOT return markdown. Do NOT wrap JSON in code fences.
@@ -53,7 +44,54 @@ RULES:
 - Keep the topic and difficulty roughly consistent unless instruction asks otherwise.
 """.strip()
 
+REFINEMENT_PATCH_SYSTEM_PROMPT = """
+You are a Canvas Editor.
+You edit an EXISTING educational question based on a teacher's instruction.
+You return ONLY the fields that change, as a JSON patch.
+You MUST return ONLY valid JSON (no markdown, no commentary).
+You MUST preserve correctness and internal consistency.
+
+OUTPUT FORMAT (STRICT JSON ONLY):
+{
+  "patch": {
+    "<field>": <new value>
+  }
+}
+
+RULES:
+- Allowed fields: question_type, question_text, options, correct_answer, explanation, tags, confidence_score.
+- Omit every field that does not change. Do NOT repeat unchanged values.
+- "options" may contain only the changed letters, e.g. {"C": "new text"}. Use null only when switching to an open question.
+- If a change makes the current explanation or correct_answer wrong, include the updated field.
+- Keep question_type the same unless the instruction explicitly requests a change.
+""".strip()
+
+
+def _user_message(instruction: str, current_question: Dict[str, Any]) -> str:
+    return f"""
+CURRENT QUESTION (the only source of truth, JSON):
+{json.dumps(current_question, ensure_ascii=False)}
+
+INSTRUCTION:
+{instruction}
+""".strip()
+
+
+def build_refinement_prompt(
+    instruction: str,
+    current_question: Dict[str, Any],
+) -> List[ChatCompletionMessageParam]:
+    return [
+        {"role": "system", "content": REFINEMENT_SYSTEM_PROMPT},
+        {"role": "user", "content": _user_message(instruction, current_question)},
+    ]
+
+
+def build_refinement_patch_prompt(
+    instruction: str,
+    current_question: Dict[str, Any],
+) -> List[ChatCompletionMessageParam]:
     return [
-        {"role": "system", "content": system},
-        {"role": "user", "content": user},
+        {"role": "system", "content": REFINEMENT_PATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": _user_message(instruction, current_question)},
     ]
@@ -1,68 +1,79 @@
-from typing import List
-from openai.types.chat import ChatCompletionMessageParam
+from __future__ import annotations
 
+from typing import TYPE_CHECKING, List, Optional
+
+from app.ai.prompts.avoid import build_avoid_block
 from app.schemas.similar import Difficulty
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
 
-def build_similar_prompt(
-    instruction: str, count: int, difficulty: Difficulty, data_url: str
-) -> List[ChatCompletionMessageParam]:
+# Static and byte-identical across requests so providers can reuse the cached
+# prefix. Difficulty, count and instruction go in the user message.
+SIMILAR_SYSTEM_PROMPT = """
+You are an educational content generator for teachers.
+CRITICAL OUTPUT RULES:
+- Output MUST be valid JSON only. No markdown. No code fences. No commentary.
+- Output MUST conform to the required JSON shape exactly.
+- You will be given an IMAGE of a question
+- Generate similar questions by cloning the style, topic, and logic.
+- Every question MUST include a detailed step-by-step explanation/solution.
 
-    system = f"""
-        You are an educational content generator for teachers.
-        CRITICAL OUTPUT RULES:
-        - Output MUST be valid JSON only. No markdown. No code fences. No commentary.
-        - Output MUST conform to the required JSON shape exactly.
-        - You will be given an IMAGE of a question
-        - Generate similar questions by cloning the style, topic, and logic.
-        - Every question MUST include a detailed step-by-step explanation/solution.
-        - Target difficulty: {difficulty}
+QUALITY RULES:
+- Avoid references to “the text says…”; write naturally.
+- Questions must match the requested difficulty.
+- Ensure the correct answer is actually correct.
+- Explanations must justify why the answer is correct (and for MCQ, why distractors are wrong).
 
-        QUALITY RULES:
-        - Avoid references to “the text says…”; write naturally.
-        - Questions must match the requested difficulty.
-        - Ensure the correct answer is actually correct based on the STUDY TEXT.
-        - Explanations must justify why the answer is correct (and for MCQ, why distractors are wrong).
-    """.strip()
+OUTPUT JSON SHAPE (STRICT):
+{
+"questions": [
+    {
+    "question_type": "mcq" | "open",
+    "question_text": "string",
 
-    user = f"""
-        TASK:
-        Generate exactly {count} questions.
-        Use the image as the source question.
-        Use this instruction {instruction}
+    "options": 
+        - if question_type == "mcq": {"A":"string","B":"string","C":"string","D":"string"}
+        - if question_type == "open": null
+    
+    "correct_answer": 
+        - if question_type == "mcq": one of "A","B","C","D"
+        - if question_type == "open": a concise correct response (string)
 
-        OUTPUT JSON SHAPE (STRICT):
-        {{
-        "questions": [
-            {{
-            "question_type": "mcq" | "open",
-            "question_text": "string",
+    "explanation": "string (detailed, step-by-step)",
 
-            "options": 
-                - if question_type == "mcq": {{"A":"string","B":"string","C":"string","D":"string"}}
-                - if question_type == "open": null
-            
-            "correct_answer": 
-                - if question_type == "mcq": one of "A","B","C","D"
-                - if question_type == "open": a concise correct response (string)
+    "tags": object OR null,
+    "confidence_score": number(0..1) OR null
+    }
+]
+}
+""".strip()
 
-            "explanation": "string (detailed, step-by-step)",
 
-            "tags": object OR null,
-            "confidence_score": number(0..1) OR null
-            }}
-        ]
-        }}
+def build_similar_prompt(
+    instruction: str,
+    count: int,
+    difficulty: Difficulty,
+    data_url: str,
+    avoid: Optional[List[str]] = None,
+) -> List[ChatCompletionMessageParam]:
 
-    """.strip()
+    user = f"""
+TASK:
+Generate exactly {count} questions.
+Use the image as the source question.
+Target difficulty: {difficulty}
+Use this instruction {instruction}
+{build_avoid_block(avoid)}
+""".strip()
 
     return [
-        {"role": "system", "content": system},
+        {"role": "system", "content": SIMILAR_SYSTEM_PROMPT},
         {
             "role": "user",
             "content": [
-                {"type": "text", "text": user},
                 {"type": "image_url", "image_url": {"url": data_url}},
+                {"type": "text", "text": user},
             ],
         },
     ]
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Mapping, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.logger import logger
+
+if TYPE_CHECKING:
+    from openai import RateLimitError
+
+T = TypeVar("T")
+
+# Lower value is served first.
+PRIORITIES: Dict[str, int] = {"interactive": 0, "standard": 1, "bulk": 2}
+
+AGENT_PRIORITY: Dict[str, str] = {
+    "refinement": "interactive",
+    "search": "interactive",
+    "similar": "standard",
+    "document": "bulk",
+    "embedding": "bulk",
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def priority_for(agent: Optional[str]) -> str:
+    return AGENT_PRIORITY.get(agent or "", "standard")
+
+
+def _parse_seconds(value: Optional[str], now: float) -> Optional[float]:
+    """
+    Parses the reset/retry formats providers send: delta seconds ("2"),
+    durations ("1m30s", "250ms"), epoch seconds or milliseconds, HTTP dates.
+    Returns seconds from now.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is not None:
+        if number > 1e12:
+            return max(0.0, number / 1000 - now)
+        if number > 1e9:
+            return max(0.0, number - now)
+        return max(0.0, number)
+
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class LLMScheduler:
+    """
+    Single gate for every chat and embedding call in this process.
+
+    Callers wait in a priority queue (interactive before bulk, FIFO within a
+    class). Concurrency adapts AIMD-style: it grows slowly on success and
+    halves on a provider 429. Rate-limit headers and Retry-After pause the
+    whole queue until the provider's window resets, and 429s are retried here
+    instead of surfacing as agent failures.
+
+    Waiting blocks the calling thread, so callers must be on worker threads
+    (routes go through run_in_threadpool); calls from the event loop are
+    refused rather than allowed to stall every request on the worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        min_concurrency: int,
+        rate_limit_retries: int,
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.rate_limit_retries = rate_limit_retries
+
+        self._cond = threading.Condition()
+        self._heap: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._limit = float(max_concurrency)
+        self._paused_until = 0.0
+
+        self._waits: Dict[str, deque] = defaultdict(lambda: deque(maxlen=500))
+        self._queued_by_priority: Dict[str, int] = defaultdict(int)
+        self._rate_limited = 0
+
+    def run(self, fn: Callable[[], T], *, priority: str = "standard") -> T:
+        from openai import RateLimitError
+
+        if _on_event_loop():
+            raise RuntimeError(
+                "LLM calls block; run them in a worker thread (run_in_threadpool)"
+            )
+
+        last_error: Optional[RateLimitError] = None
+        for attempt in range(self.rate_limit_retries + 1):
+            self._acquire(priority)
+            try:
+                result = fn()
+            except RateLimitError as e:
+                last_error = e
+                self._on_rate_limited(e.response.headers, attempt)
+                continue
+            finally:
+                self._release()
+            self._on_success(getattr(result, "headers", None))
+            return result
+
+        assert last_error is not None
+        raise last_error
+
+    def _acquire(self, priority: str) -> None:
+        entry = (PRIORITIES.get(priority, PRIORITIES["standard"]), next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            self._queued_by_priority[priority] += 1
+            try:
+                while True:
+                    pause = self._paused_until - time.time()
+                    if (
+                        pause <= 0
+                        and self._heap[0] == entry
+                        and self._active < int(self._limit)
+                    ):
+                        break
+                    self._cond.wait(timeout=pause if pause > 0 else None)
+            except BaseException:
+                self._heap.remove(entry)
+                heapq.heapify(self._heap)
+                self._queued_by_priority[priority] -= 1
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._heap)
+            self._queued_by_priority[priority] -= 1
+            self._active += 1
+            self._waits[priority].append(time.monotonic() - start)
+            # The next waiter may also fit under the limit.
+            self._cond.notify_all()
+
+    def _release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _on_success(self, headers: Optional[Mapping[str, str]]) -> None:
+        with self._cond:
+            self._limit = min(
+                float(self.max_concurrency), self._limit + 1.0 / max(self._limit, 1.0)
+            )
+            if not headers:
+                return
+            remaining = _header(
+                headers, "x-ratelimit-remaining-requests", "x-ratelimit-remaining"
+            )
+            if remaining is not None and remaining.strip() in ("0", "0.0"):
+                reset = _parse_seconds(
+                    _header(headers, "x-ratelimit-reset-requests", "x-ratelimit-reset"),
+                    time.time(),
+                )
+                if reset:
+                    self._pause(reset)
+
+    def _on_rate_limited(self, headers: Mapping[str, str], attempt: int) -> None:
+        now = time.time()
+        retry_after_ms = _header(headers, "retry-after-ms")
+        delay = (
+            float(retry_after_ms) / 1000
+            if retry_after_ms
+            else _parse_seconds(_header(headers, "retry-after"), now)
+        )
+        if delay is None:
+            delay = _parse_seconds(
+                _header(headers, "x-ratelimit-reset-requests", "x-ratelimit-reset"), now
+            )
+        if delay is None:
+            delay = min(30.0, 2.0**attempt)
+
+        with self._cond:
+            self._rate_limited += 1
+            self._limit = max(float(self.min_concurrency), self._limit / 2)
+            self._pause(delay)
+        logger.warning(
+            f"LLM provider rate limited; pausing {round(delay, 2)}s, "
+            f"concurrency limit now {int(self._limit)}"
+        )
+
+    def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.time() + seconds)
+        self._cond.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = {}
+            for priority, samples in self._waits.items():
+                ordered = sorted(samples)
+                if not ordered:
+                    continue
+                waits[priority] = {
+                    "count": len(ordered),
+                    "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+                    "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 2),
+                }
+            return {
+                "concurrency_limit": int(self._limit),
+                "active": self._active,
+                "queue_depth": len(self._heap),
+                "queue_depth_by_priority": {
+                    k: v for k, v in self._queued_by_priority.items() if v
+                },
+                "paused_for_seconds": round(max(0.0, self._paused_until - time.time()), 2),
+                "rate_limited_total": self._rate_limited,
+                "wait": waits,
+            }
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    min_concurrency=settings.LLM_MIN_CONCURRENCY,
+    rate_limit_retries=settings.LLM_RATE_LIMIT_RETRIES,
+)
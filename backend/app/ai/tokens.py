@@ -0,0 +1,88 @@
+from functools import lru_cache
+from typing import List, Optional
+
+from app.ai.client import select_model
+from app.core.config import settings
+from app.core.logger import logger
+
+# Rough chars-per-token ratio for English prose, used when no tokenizer is
+# available and to size text that has not been fetched yet.
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    # tiktoken downloads the encoding on first use (cached under
+    # TIKTOKEN_CACHE_DIR); if that fails, fall back to a character estimate.
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(
+            f"Tokenizer unavailable ({type(e).__name__}); "
+            f"estimating {_CHARS_PER_TOKEN} chars per token"
+        )
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return estimate_tokens(len(text))
+
+
+def estimate_tokens(chars: int) -> int:
+    """Token estimate for `chars` characters of prose not yet in hand."""
+    return (chars + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    enc = _encoder()
+    if enc is not None:
+        tokens = enc.encode(text, disallowed_special=())
+        return enc.decode(tokens[:max_tokens])
+    return text[: max_tokens * _CHARS_PER_TOKEN]
+
+
+def context_budget(model: Optional[str]) -> int:
+    return settings.LLM_CONTEXT_TOKEN_BUDGETS.get(
+        model or "", settings.LLM_DEFAULT_CONTEXT_TOKENS
+    )
+
+
+def generation_context_tokens(agent: str, count: int) -> int:
+    """
+    Prompt tokens available to a generation call of `count` questions: the
+    smaller context target of the models it may run on (fast tier or
+    escalated) minus room for the expected output.
+    """
+    budget = min(
+        context_budget(select_model(agent, size=count)),
+        context_budget(select_model(agent, size=count, escalate=True)),
+    )
+    return budget - count * settings.LLM_OUTPUT_TOKENS_PER_QUESTION
+
+
+def fit_chunks(
+    chunks: List[str], budget_tokens: int, min_partial_tokens: int = 200
+) -> List[str]:
+    """
+    Keeps chunks in the given (relevance) order until the budget is spent.
+    The first chunk that does not fit is truncated if enough room is left.
+    """
+    kept: List[str] = []
+    remaining = budget_tokens
+    for chunk in chunks:
+        if remaining <= 0:
+            break
+        tokens = count_tokens(chunk)
+        if tokens <= remaining:
+            kept.append(chunk)
+            remaining -= tokens
+            continue
+        if remaining >= min_partial_tokens:
+            kept.append(truncate_to_tokens(chunk, remaining))
+        break
+    return kept
@@ -0,0 +1,96 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from fastapi import Depends, File, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.api.deps.auth import get_current_user
+from app.core.admission import AdmissionRejected, admission_controller
+from app.core.config import settings
+from app.schemas.document import DocumentGenerateRequest
+from app.schemas.similar import SimilarGenerateRequest
+from app.services.ingestion import count_upload_pdfs
+
+
+def _rejected(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Too many requests ({e.reason}). Try again later.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+@asynccontextmanager
+async def _admit(user_id: str, weight: float) -> AsyncIterator[None]:
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+
+    try:
+        lease_id = await admission_controller.acquire(user_id, weight)
+    except AdmissionRejected as e:
+        raise _rejected(e)
+    try:
+        yield
+    finally:
+        await admission_controller.release(lease_id)
+
+
+async def admit_document_generation(
+    req: DocumentGenerateRequest = Depends(DocumentGenerateRequest.as_form),
+    user=Depends(get_current_user),
+) -> AsyncIterator[None]:
+    async with _admit(str(user.id), req.quantity):
+        yield
+
+
+async def admit_document_regeneration(
+    req: DocumentGenerateRequest,
+    user=Depends(get_current_user),
+) -> AsyncIterator[None]:
+    async with _admit(str(user.id), req.quantity):
+        yield
+
+
+async def admit_similar_generation(
+    req: SimilarGenerateRequest = Depends(SimilarGenerateRequest.as_form),
+    user=Depends(get_current_user),
+) -> AsyncIterator[None]:
+    async with _admit(str(user.id), req.quantity):
+        yield
+
+
+async def admit_refinement(user=Depends(get_current_user)) -> AsyncIterator[None]:
+    async with _admit(str(user.id), 1):
+        yield
+
+
+async def admit_session_refinement(
+    user=Depends(get_current_user),
+) -> AsyncIterator[None]:
+    async with _admit(str(user.id), settings.ADMISSION_SESSION_REFINEMENT_WEIGHT):
+        yield
+
+
+async def admit_batch_ingestion(
+    files: List[UploadFile] = File(...),
+    user=Depends(get_current_user),
+) -> Optional[str]:
+    """
+    Rejects oversized batches before any upload is read into memory, then
+    charges ADMISSION_BATCH_FILE_WEIGHT per PDF. Returns the lease id (None
+    when admission is off) for the route to release once the background
+    ingestion ends.
+    """
+    if sum(f.size or 0 for f in files) > settings.BATCH_INGEST_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Batch is too large.")
+    if not settings.ADMISSION_ENABLED:
+        return None
+
+    count = await run_in_threadpool(count_upload_pdfs, [f.file for f in files])
+    try:
+        return await admission_controller.acquire(
+            str(user.id), max(1, count) * settings.ADMISSION_BATCH_FILE_WEIGHT
+        )
+    except AdmissionRejected as e:
+        raise _rejected(e)
@@ -1,9 +1,7 @@
-from fastapi import Depends, HTTPException, status
-from supabase import Client
+from fastapi import Cookie, Depends, Header, HTTPException, status
 
-from fastapi import Cookie, Header, HTTPException, status
-
-from app.db.client import get_supabase_client
+from app.core.resilience import DependencyUnavailable
+from app.db.client import get_supabase_client, supabase_dependency
 
 
 def get_bearer_token(
@@ -27,10 +25,12 @@ def get_bearer_token(
 
 async def get_current_user(
     token: str = Depends(get_bearer_token),
-    supabase: Client = Depends(get_supabase_client),
+    supabase=Depends(get_supabase_client),
 ):
     try:
-        response = supabase.auth.get_user(token)
+        response = supabase_dependency.call(lambda: supabase.auth.get_user(token))
+    except DependencyUnavailable:
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
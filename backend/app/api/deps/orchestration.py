@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+from app.orchestration.document import DocumentOrchestration
+from app.orchestration.refinement import RefinementOrchestration
+from app.orchestration.similar import SimilarOrchestration
+
+# Built on first use (or by the startup warm-up), not at import.
+
+
+@lru_cache(maxsize=1)
+def get_document_orchestration() -> DocumentOrchestration:
+    return DocumentOrchestration()
+
+
+@lru_cache(maxsize=1)
+def get_similar_orchestration() -> SimilarOrchestration:
+    return SimilarOrchestration()
+
+
+@lru_cache(maxsize=1)
+def get_refinement_orchestration() -> RefinementOrchestration:
+    return RefinementOrchestration()
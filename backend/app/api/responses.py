@@ -0,0 +1,25 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    # Models built with model_construct() from our own DB rows are trusted:
+    # their fields are emitted as-is instead of going back through pydantic.
+    # None of our response models use aliases or custom serializers.
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class QuestJSONResponse(JSONResponse):
+    """orjson-backed JSON response used as the app's default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,15 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from supabase import Client
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict
 
-from supabase_auth import SignUpWithEmailAndPasswordCredentials
-
-from app.db.client import get_supabase_client
+from app.db.client import new_supabase_client
 from app.schemas.auth import UserLogin, UserSignup
 from app.api.deps.auth import get_current_user, get_bearer_token
 
+if TYPE_CHECKING:
+    from supabase_auth import SignUpWithEmailAndPasswordCredentials
+
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
@@ -38,7 +38,7 @@ def _set_auth_cookie(response: JSONResponse, token: str) -> None:
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def signup(
     user: UserSignup,
-    supabase: Client = Depends(get_supabase_client),
+    supabase=Depends(new_supabase_client),
 ) -> JSONResponse:
     try:
         payload: SignUpWithEmailAndPasswordCredentials = {
@@ -93,7 +93,7 @@ async def signup(
 @router.post("/login")
 async def login(
     user: UserLogin,
-    supabase: Client = Depends(get_supabase_client),
+    supabase=Depends(new_supabase_client),
 ) -> JSONResponse:
     try:
         res = supabase.auth.sign_in_with_password(
@@ -144,7 +144,7 @@ async def login(
 
 @router.post("/logout")
 async def logout(
-    supabase: Client = Depends(get_supabase_client),
+    supabase=Depends(new_supabase_client),
 ) -> JSONResponse:
 
     try:
@@ -162,7 +162,7 @@ async def logout(
 
 @router.post("/refresh")
 async def refresh_token(
-    supabase: Client = Depends(get_supabase_client),
+    supabase=Depends(new_supabase_client),
 ) -> JSONResponse:
     try:
         res = supabase.auth.refresh_session()
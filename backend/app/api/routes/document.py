@@ -1,35 +1,147 @@
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from typing import List, Optional, Tuple
+from uuid import UUID
 
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    UploadFile,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+
+from app.api.deps.admission import (
+    admit_batch_ingestion,
+    admit_document_generation,
+    admit_document_regeneration,
+)
 from app.api.deps.auth import get_current_user
+from app.api.deps.orchestration import get_document_orchestration
+from app.api.responses import QuestJSONResponse
+from app.core.admission import admission_controller
+from app.db.repositories.document import get_document
+from app.models.document import Document
 from app.orchestration.document import DocumentOrchestration
 from app.schemas.document import (
+    DocumentBatchResponse,
     DocumentGenerateRequest,
     DocumentGenerateResponse,
+    DocumentStatusResponse,
 )
 from app.services.document import DocumentService
+from app.services.ingestion import BatchIngestionService, expand_uploads
+from app.utils.pdf_sandbox import PdfRejected, check_pdf_limits
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 document_service = DocumentService()
-orchestration = DocumentOrchestration()
+ingestion_service = BatchIngestionService()
 
 
 @router.post(
     "/generate",
     status_code=status.HTTP_201_CREATED,
     response_model=DocumentGenerateResponse,
+    dependencies=[Depends(admit_document_generation)],
 )
 async def generate(
     file: UploadFile = File(...),
     req: DocumentGenerateRequest = Depends(DocumentGenerateRequest.as_form),
     user=Depends(get_current_user),
+    orchestration: DocumentOrchestration = Depends(get_document_orchestration),
 ):
     pdf_bytes = await file.read()
     if not pdf_bytes:
         raise HTTPException(status_code=400, detail="Empty file.")
 
-    return orchestration.run(
-        user_id=user.id,
-        filename=file.filename or "document.pdf",
-        pdf_bytes=pdf_bytes,
-        req=req,
+    try:
+        check_pdf_limits(pdf_bytes)
+        result = await run_in_threadpool(
+            orchestration.run,
+            user_id=user.id,
+            filename=file.filename or "document.pdf",
+            pdf_bytes=pdf_bytes,
+            req=req,
+        )
+    except PdfRejected as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return QuestJSONResponse(result, status_code=status.HTTP_201_CREATED)
+
+
+@router.post(
+    "/{document_id}/generate",
+    status_code=status.HTTP_201_CREATED,
+    response_model=DocumentGenerateResponse,
+    dependencies=[Depends(admit_document_regeneration)],
+)
+async def generate_more(
+    document_id: UUID,
+    req: DocumentGenerateRequest,
+    user=Depends(get_current_user),
+    orchestration: DocumentOrchestration = Depends(get_document_orchestration),
+):
+    result = await run_in_threadpool(
+        orchestration.run_more, user_id=user.id, document_id=document_id, req=req
+    )
+    return QuestJSONResponse(result, status_code=status.HTTP_201_CREATED)
+
+
+async def _ingest(
+    user_id: UUID, docs: List[Tuple[Document, bytes]], lease_id: Optional[str]
+) -> None:
+    try:
+        await run_in_threadpool(ingestion_service.process, user_id, docs)
+    finally:
+        if lease_id is not None:
+            await admission_controller.release(lease_id)
+
+
+@router.post(
+    "/batch",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=DocumentBatchResponse,
+)
+async def ingest_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    req: DocumentGenerateRequest = Depends(DocumentGenerateRequest.as_form),
+    user=Depends(get_current_user),
+    lease_id: Optional[str] = Depends(admit_batch_ingestion),
+):
+    """
+    Accepts PDFs and/or zip archives of PDFs and ingests them in the
+    background. Poll GET /documents/{document_id} for each file's status.
+    quantity and question_type are recorded on each file's session.
+    """
+    try:
+        uploads = [(f.filename or "document.pdf", await f.read()) for f in files]
+        # Unzipping and the registration inserts stay off the event loop.
+        pdfs = await run_in_threadpool(expand_uploads, uploads)
+        docs = await run_in_threadpool(
+            ingestion_service.register, user_id=user.id, files=pdfs, req=req
+        )
+    except BaseException:
+        if lease_id is not None:
+            await admission_controller.release(lease_id)
+        raise
+    background_tasks.add_task(_ingest, user.id, docs, lease_id)
+    return QuestJSONResponse(
+        DocumentBatchResponse(
+            documents=[
+                DocumentStatusResponse.model_validate(doc.model_dump())
+                for doc, _ in docs
+            ]
+        ),
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+@router.get("/{document_id}", response_model=DocumentStatusResponse)
+async def get_document_status(document_id: UUID, user=Depends(get_current_user)):
+    doc = await run_in_threadpool(
+        get_document, user_id=user.id, document_id=document_id
     )
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return doc
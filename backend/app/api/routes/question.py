@@ -1,32 +1,105 @@
+import base64
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
+from app.ai.embeddings import embed_query
 from app.api.deps.auth import get_current_user
+from app.core.config import settings
 from app.db.repositories.question import (
-    get_question_by_id,
-    get_question_versions,
-    get_questions_by_session,
     get_recent_questions,
+    read_question,
+    read_question_versions,
+    read_questions_by_session,
+    search_questions,
 )
+from app.services.export import EXPORT_FORMATS, ExportFormat, iter_export_rows
+from app.utils.http import conditional_json_response
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
 
+def _encode_cursor(row: dict) -> str:
+    raw = f"{row['created_at']}|{row['session_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        created_at, session_id = (
+            base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        )
+        return created_at, str(UUID(session_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/recent")
-async def get_recent_for_user(user=Depends(get_current_user)):
-    return get_recent_questions(str(user.id))
+async def get_recent_for_user(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    before = _decode_cursor(cursor) if cursor else None
+    sessions = await run_in_threadpool(
+        get_recent_questions, str(user.id), limit=limit, before=before
+    )
+    if len(sessions) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(sessions[-1])
+    return sessions
+
+
+@router.get("/search")
+async def search_question_bank(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1),
+    user=Depends(get_current_user),
+):
+    limit = min(limit, settings.QUESTION_SEARCH_MAX_RESULTS)
+    query_embedding = await run_in_threadpool(embed_query, q)
+    return await run_in_threadpool(
+        search_questions,
+        user_id=user.id,
+        query_embedding=query_embedding,
+        limit=limit,
+    )
+
+
+@router.get("/export")
+async def export_questions(
+    format: ExportFormat = "ndjson",
+    session_id: Optional[UUID] = None,
+    user=Depends(get_current_user),
+):
+    writer, media_type, extension = EXPORT_FORMATS[format]
+    name = f"session-{session_id}" if session_id else "questions"
+    return StreamingResponse(
+        writer(iter_export_rows(user.id, session_id)),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.{extension}"',
+            # Keep compression middleware from buffering the export.
+            "Content-Encoding": "identity",
+        },
+    )
 
 
 @router.get("/{question_id}")
-async def get_question(question_id: str):
-    return get_question_by_id(UUID(question_id))
+async def get_question(question_id: str, request: Request):
+    entry = await run_in_threadpool(read_question, UUID(question_id))
+    return conditional_json_response(request, entry)
 
 
 @router.get("/session/{session_id}")
-async def get_questions_by_session_id(session_id: str):
-    return get_questions_by_session(session_id)
+async def get_questions_by_session_id(session_id: str, request: Request):
+    entry = await run_in_threadpool(read_questions_by_session, session_id)
+    return conditional_json_response(request, entry)
 
 
 @router.get("/{question_id}/versions")
-async def get_versions_for_question(question_id: str):
-    return get_question_versions(UUID(question_id))
+async def get_versions_for_question(question_id: str, request: Request):
+    entry = await run_in_threadpool(read_question_versions, UUID(question_id))
+    return conditional_json_response(request, entry)
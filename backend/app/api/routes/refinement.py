@@ -1,28 +1,66 @@
 from uuid import UUID
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
+from app.api.deps.admission import admit_refinement, admit_session_refinement
 from app.api.deps.auth import get_current_user
+from app.api.deps.orchestration import get_refinement_orchestration
 from app.orchestration.refinement import RefinementOrchestration
 from app.schemas.document import (
     DocumentGenerateRequest,
     DocumentGenerateResponse,
 )
-from app.schemas.refinement import RefinementRequest, RefinementResponse
+from app.schemas.refinement import (
+    RefinementRequest,
+    RefinementResponse,
+    SessionRefinementRequest,
+)
 
 router = APIRouter(prefix="/refine", tags=["refinement"])
-orchestration = RefinementOrchestration()
+
+
+@router.post(
+    "/session/{session_id}",
+    dependencies=[Depends(admit_session_refinement)],
+)
+async def refine_session(
+    session_id: UUID,
+    req: SessionRefinementRequest,
+    user=Depends(get_current_user),
+    orchestration: RefinementOrchestration = Depends(get_refinement_orchestration),
+):
+    # The NDJSON generator is iterated in the threadpool by StreamingResponse.
+    lines = await run_in_threadpool(
+        orchestration.run_session,
+        user_id=user.id,
+        session_id=session_id,
+        instruction=req.instruction,
+        question_ids=req.question_ids,
+    )
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        # Keep compression middleware from buffering the per-question lines.
+        headers={"Content-Encoding": "identity"},
+    )
 
 
 @router.post(
     "/{question_id}",
     status_code=status.HTTP_201_CREATED,
     response_model=RefinementResponse,
+    dependencies=[Depends(admit_refinement)],
 )
 async def generate(
     question_id: UUID,
     req: RefinementRequest,
     user=Depends(get_current_user),
+    orchestration: RefinementOrchestration = Depends(get_refinement_orchestration),
 ):
-    return orchestration.run(
-        user_id=user.id, question_id=question_id, instruction=req.instruction
+    return await run_in_threadpool(
+        orchestration.run,
+        user_id=user.id,
+        question_id=question_id,
+        instruction=req.instruction,
     )
@@ -1,21 +1,27 @@
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 
+from app.api.deps.admission import admit_similar_generation
 from app.api.deps.auth import get_current_user
+from app.api.deps.orchestration import get_similar_orchestration
+from app.api.responses import QuestJSONResponse
 from app.orchestration.similar import SimilarOrchestration
-from app.schemas.similar import SimilarGenerateRequest
+from app.schemas.similar import SimilarGenerateRequest, SimilarGenerateResponse
 
 router = APIRouter(prefix="/similar", tags=["similar-question"])
-orchestration = SimilarOrchestration()
 
 
 @router.post(
     "/generate",
     status_code=status.HTTP_201_CREATED,
+    response_model=SimilarGenerateResponse,
+    dependencies=[Depends(admit_similar_generation)],
 )
 async def similar_question(
     req: SimilarGenerateRequest = Depends(SimilarGenerateRequest.as_form),
     image: UploadFile = File(...),
     user=Depends(get_current_user),
+    orchestration: SimilarOrchestration = Depends(get_similar_orchestration),
 ):
     if not req.instruction.strip():
         raise HTTPException(status_code=400, detail="instruction is required")
@@ -24,4 +30,7 @@ async def similar_question(
     if not img_bytes:
         raise HTTPException(status_code=400, detail="Empty image")
 
-    return orchestration.run(user_id=user.id, image=image, req=req, img_bytes=img_bytes)
+    result = await run_in_threadpool(
+        orchestration.run, user_id=user.id, image=image, req=req, img_bytes=img_bytes
+    )
+    return QuestJSONResponse(result, status_code=status.HTTP_201_CREATED)
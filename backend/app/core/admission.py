@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+import uuid
+from typing import Optional
+
+from anyio import CancelScope, to_thread
+
+from app.core.config import settings
+from app.utils.sqlite import connect_local_db
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """
+    Host-wide admission for LLM-heavy endpoints, shared by every worker through
+    a SQLite file:
+
+    - a token bucket per user, charged by request weight (requested quantity);
+    - a global cap on concurrently running requests (leases);
+    - a fair wait queue: when capacity frees up, the waiting user holding the
+      fewest leases goes first, then the oldest ticket.
+
+    Requests that cannot be admitted within ADMISSION_MAX_WAIT_SECONDS, or that
+    find the queue full, are rejected with a Retry-After hint.
+
+    SQLite work runs in worker threads, never on the event loop. Waiters poll
+    with a read-only check (WAL readers never take the lock) and only open a
+    write transaction when they are next in line and a lease is free.
+    """
+
+    def __init__(
+        self,
+        *,
+        path: str,
+        max_concurrency: int,
+        bucket_capacity: float,
+        refill_per_second: float,
+        max_queue: int,
+        max_wait_seconds: float,
+        lease_ttl_seconds: float,
+        poll_interval: float = 0.1,
+    ):
+        self.path = path
+        self.max_concurrency = max_concurrency
+        self.bucket_capacity = bucket_capacity
+        self.refill_per_second = refill_per_second
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.lease_ttl_seconds = lease_ttl_seconds
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_local_db(self.path)
+            conn.executescript(
+                """
+                create table if not exists buckets (
+                  user_id text primary key,
+                  tokens real not null,
+                  updated_at real not null
+                );
+                create table if not exists leases (
+                  id text primary key,
+                  user_id text not null,
+                  expires_at real not null
+                );
+                create table if not exists waiters (
+                  id text primary key,
+                  user_id text not null,
+                  enqueued_at real not null
+                );
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    def _purge(self, conn, now: float) -> None:
+        conn.execute("delete from leases where expires_at < ?", (now,))
+        # Waiters whose request died without dequeuing.
+        conn.execute(
+            "delete from waiters where enqueued_at < ?",
+            (now - self.max_wait_seconds * 2,),
+        )
+
+    def _charge(self, user_id: str, weight: float) -> None:
+        weight = min(weight, self.bucket_capacity)
+        now = time.time()
+        conn = self._conn()
+        conn.execute("begin immediate")
+        try:
+            self._purge(conn, now)
+            (queued,) = conn.execute("select count(*) from waiters").fetchone()
+            if queued >= self.max_queue:
+                raise AdmissionRejected("queue full", self.max_wait_seconds)
+
+            row = conn.execute(
+                "select tokens, updated_at from buckets where user_id = ?", (user_id,)
+            ).fetchone()
+            tokens = self.bucket_capacity
+            if row is not None:
+                tokens = min(
+                    self.bucket_capacity,
+                    row[0] + (now - row[1]) * self.refill_per_second,
+                )
+            if tokens < weight:
+                raise AdmissionRejected(
+                    "rate limited", (weight - tokens) / self.refill_per_second
+                )
+            conn.execute(
+                "insert or replace into buckets (user_id, tokens, updated_at) "
+                "values (?, ?, ?)",
+                (user_id, tokens - weight, now),
+            )
+            conn.execute("commit")
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def _refund(self, user_id: str, weight: float) -> None:
+        conn = self._conn()
+        conn.execute(
+            "update buckets set tokens = min(?, tokens + ?) where user_id = ?",
+            (self.bucket_capacity, min(weight, self.bucket_capacity), user_id),
+        )
+
+    def _enqueue(self, user_id: str) -> str:
+        ticket = uuid.uuid4().hex
+        self._conn().execute(
+            "insert into waiters (id, user_id, enqueued_at) values (?, ?, ?)",
+            (ticket, user_id, time.time()),
+        )
+        return ticket
+
+    def _head(self, conn, now: float) -> Optional[str]:
+        """The waiter to grant next: fewest leases held, then oldest ticket."""
+        row = conn.execute(
+            """
+            select w.id
+            from waiters w
+            left join (
+              select user_id, count(*) as n from leases
+              where expires_at >= ? group by user_id
+            ) l on l.user_id = w.user_id
+            where w.enqueued_at >= ?
+            order by coalesce(l.n, 0), w.enqueued_at
+            limit 1
+            """,
+            (now, now - self.max_wait_seconds * 2),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _peek(self, ticket: str) -> tuple[bool, bool]:
+        """
+        Read-only pre-check: (ticket is next in line, a lease is free), so
+        waiters that cannot win never take the write lock.
+        """
+        now = time.time()
+        conn = self._conn()
+        (active,) = conn.execute(
+            "select count(*) from leases where expires_at >= ?", (now,)
+        ).fetchone()
+        return self._head(conn, now) == ticket, active < self.max_concurrency
+
+    def _try_grant(self, ticket: str, user_id: str) -> Optional[str]:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("begin immediate")
+        try:
+            self._purge(conn, now)
+            (active,) = conn.execute("select count(*) from leases").fetchone()
+            if active >= self.max_concurrency:
+                conn.execute("commit")
+                return None
+            if self._head(conn, now) != ticket:
+                conn.execute("commit")
+                return None
+            lease_id = uuid.uuid4().hex
+            conn.execute("delete from waiters where id = ?", (ticket,))
+            conn.execute(
+                "insert into leases (id, user_id, expires_at) values (?, ?, ?)",
+                (lease_id, user_id, now + self.lease_ttl_seconds),
+            )
+            conn.execute("commit")
+            return lease_id
+        except Exception:
+            conn.execute("rollback")
+            raise
+
+    def _dequeue(self, ticket: str) -> None:
+        self._conn().execute("delete from waiters where id = ?", (ticket,))
+
+    async def acquire(self, user_id: str, weight: float) -> str:
+        await to_thread.run_sync(self._charge, user_id, weight)
+        ticket = await to_thread.run_sync(self._enqueue, user_id)
+        deadline = time.monotonic() + self.max_wait_seconds
+        try:
+            while True:
+                is_next, has_capacity = await to_thread.run_sync(self._peek, ticket)
+                if is_next and has_capacity:
+                    lease_id = await to_thread.run_sync(
+                        self._try_grant, ticket, user_id
+                    )
+                    if lease_id is not None:
+                        return lease_id
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AdmissionRejected("saturated", self.max_wait_seconds)
+                await asyncio.sleep(min(self.poll_interval, remaining))
+        except BaseException:
+            # Clean up even when the request was cancelled.
+            with CancelScope(shield=True):
+                await to_thread.run_sync(self._dequeue, ticket)
+                await to_thread.run_sync(self._refund, user_id, weight)
+            raise
+
+    def _release(self, lease_id: str) -> None:
+        self._conn().execute("delete from leases where id = ?", (lease_id,))
+
+    async def release(self, lease_id: str) -> None:
+        with CancelScope(shield=True):
+            await to_thread.run_sync(self._release, lease_id)
+
+
+admission_controller = AdmissionController(
+    path=settings.ADMISSION_DB_PATH,
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    bucket_capacity=settings.ADMISSION_BUCKET_CAPACITY,
+    refill_per_second=settings.ADMISSION_REFILL_PER_SECOND,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS,
+    lease_ttl_seconds=settings.ADMISSION_LEASE_TTL_SECONDS,
+)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,11 +16,182 @@ class Settings(BaseSettings):
     OPENROUTER_BASE_URL: str = ""
 
     QUEST_MODEL: str = ""
+    # Cheaper, faster model for small calls. A call goes to the fast tier when
+    # its size (questions requested or edited) is within the agent's limit in
+    # LLM_FAST_TIER_MAX_SIZE. Calls retried after a validation failure always
+    # escalate to QUEST_MODEL.
+    QUEST_FAST_MODEL: str = ""
+    LLM_FAST_TIER_MAX_SIZE: dict[str, int] = {
+        "refinement": 1,
+        "document": 5,
+        "similar": 3,
+    }
     EMBEDDING_MODEL: str = ""
+    # Embedding size, requested from the provider via `dimensions`
+    # (Matryoshka models such as text-embedding-3-* shorten with little
+    # recall loss). The halfvec columns must match: after changing it run
+    # `select public.set_embedding_dim(<n>);` (010_embedding_dim.sql). The
+    # API refuses to start while they differ.
+    # Models that reject `dimensions` (text-embedding-ada-002) need
+    # EMBEDDING_SEND_DIMENSIONS off and EMBEDDING_DIM at their native size.
+    EMBEDDING_DIM: int = 1536
+    EMBEDDING_SEND_DIMENSIONS: bool = True
 
     FRONTEND_URL: str = ""
+
+    # Production server (python -m app.server): gunicorn with uvicorn workers.
+    # SERVER_WORKERS=0 sizes the pool as SERVER_WORKERS_PER_CORE x CPUs + 1,
+    # capped at SERVER_MAX_WORKERS. Worker and graceful timeouts are derived
+    # from the longest LLM latency budget plus SERVER_TIMEOUT_MARGIN_SECONDS.
+    SERVER_HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_WORKERS_PER_CORE: int = 2
+    SERVER_MAX_WORKERS: int = 8
+    SERVER_TIMEOUT_MARGIN_SECONDS: float = 30
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_MAX_REQUESTS: int = 1000
+    SERVER_MAX_REQUESTS_JITTER: int = 100
+    SERVER_PRELOAD_APP: bool = True
+
+    # Import clients, validators and tokenizers at startup rather than on the
+    # first request that needs them.
+    WARMUP_ON_STARTUP: bool = True
     PDF_CHUNK_SIZE: int = 3500
     PDF_CHUNK_OVERLAP: int = 400
+    # "offsets" stores each chunk as (start, end) into the document's
+    # extracted text (materialized by match_doc_chunks); "content" stores
+    # the chunk text on every row.
+    DOC_CHUNK_STORAGE: Literal["offsets", "content"] = "offsets"
+    EMBEDDING_BATCH_SIZE: int = 64
+
+    # Batch ingestion: uploads, extraction requests, embedding calls and
+    # inserts run in a thread pool shared by all batches in a worker.
+    BATCH_INGEST_MAX_FILES: int = 50
+    BATCH_INGEST_MAX_BYTES: int = 200 * 1024 * 1024
+    BATCH_INGEST_IO_WORKERS: int = 8
+
+    # Uploads above PDF_MAX_BYTES, or with more than PDF_REJECT_PAGES page
+    # objects, are refused before parsing. Text is extracted in resource-
+    # limited subprocesses from at most PDF_MAX_PAGES pages.
+    PDF_MAX_BYTES: int = 50 * 1024 * 1024
+    PDF_REJECT_PAGES: int = 2000
+    PDF_MAX_PAGES: int = 300
+    PDF_MAX_TEXT_CHARS: int = 2_000_000
+    PDF_EXTRACTION_WORKERS: int = 2
+    PDF_EXTRACTION_TIMEOUT_SECONDS: float = 60
+    PDF_EXTRACTION_CPU_SECONDS: int = 30
+    PDF_EXTRACTION_MEMORY_MB: int = 1024
+    PDF_EXTRACTION_TASKS_PER_WORKER: int = 50
+
+    # Retrieval depth scales with the requested quantity, capped by the
+    # document's chunk count and the generation prompt budget. Chunks scoring
+    # below RETRIEVAL_RELATIVE_CUTOFF x the best match are dropped once
+    # RETRIEVAL_MIN_CHUNKS are kept.
+    RETRIEVAL_QUESTIONS_PER_CHUNK: int = 3
+    RETRIEVAL_MIN_CHUNKS: int = 2
+    RETRIEVAL_MAX_CHUNKS: int = 24
+    RETRIEVAL_RELATIVE_CUTOFF: float = 0.75
+
+    # Generated questions whose embedding cosine similarity to an earlier one
+    # in the batch, session or document reaches QUESTION_DEDUP_THRESHOLD are
+    # dropped; the freed slots are regenerated up to
+    # QUESTION_DEDUP_REGENERATE_ROUNDS times.
+    QUESTION_DEDUP_ENABLED: bool = True
+    QUESTION_DEDUP_THRESHOLD: float = 0.92
+    QUESTION_DEDUP_REGENERATE_ROUNDS: int = 1
+    QUESTION_EMBEDDING_CACHE_MAX_ENTRIES: int = 8192
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES: int = 1024
+    QUESTION_SEARCH_MAX_RESULTS: int = 50
+    # 0 (default): question search walks the halfvec HNSW index directly.
+    # When > 0, it takes limit x this many candidates from the binary-quantized
+    # index and re-ranks them by exact cosine distance. Factors below 16 are
+    # raised to 16: smaller pools lose too much recall (~0.3 at x2 in
+    # benchmarks/vector_storage.py).
+    QUESTION_SEARCH_RERANK_FACTOR: int = 0
+
+    # Rows fetched per keyset page by GET /questions/export.
+    EXPORT_PAGE_SIZE: int = 500
+
+    # Opt-in cache for chat completions. Only agents listed in
+    # LLM_CACHE_AGENTS may be served a cached response.
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_AGENTS: list[str] = ["document", "similar"]
+    LLM_CACHE_PATH: str = ".cache/llm_cache.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_MEMORY_ENTRIES: int = 256
+
+    # Per-process LLM scheduler. Concurrency adapts between the two bounds.
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MIN_CONCURRENCY: int = 1
+    LLM_RATE_LIMIT_RETRIES: int = 3
+
+    # OpenRouter and Supabase calls retry transient failures (network errors,
+    # timeouts, 5xx) with jittered exponential backoff, spending from a
+    # per-dependency retry budget of RETRY_BUDGET_RATIO retries per call.
+    # CIRCUIT_FAILURE_THRESHOLD consecutive transient failures open that
+    # dependency's breaker: calls fail fast with 503 for CIRCUIT_RESET_SECONDS.
+    RESILIENCE_MAX_ATTEMPTS: int = 3
+    RESILIENCE_BACKOFF_BASE_SECONDS: float = 0.5
+    RESILIENCE_BACKOFF_MAX_SECONDS: float = 8
+    RETRY_BUDGET_RATIO: float = 0.2
+    RETRY_BUDGET_MAX_TOKENS: float = 10
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30
+
+    # Per-agent latency budgets (seconds) bound every chat call. Agents listed
+    # in LLM_HEDGE_AGENTS send a duplicate request once a call runs past the
+    # agent's observed p95, to QUEST_FALLBACK_MODEL when it is set.
+    LLM_LATENCY_BUDGETS: dict[str, float] = {
+        "refinement": 30,
+        "similar": 90,
+        "document": 180,
+    }
+    LLM_DEFAULT_LATENCY_BUDGET: float = 120
+    LLM_HEDGE_AGENTS: list[str] = ["refinement", "similar"]
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 2.0
+    QUEST_FALLBACK_MODEL: str = ""
+
+    # Context-window targets per model (prompt plus expected output). Retrieved
+    # study text is trimmed to fit after reserving room for the output.
+    LLM_CONTEXT_TOKEN_BUDGETS: dict[str, int] = {}
+    LLM_DEFAULT_CONTEXT_TOKENS: int = 48000
+    LLM_OUTPUT_TOKENS_PER_QUESTION: int = 400
+
+    # Refinement asks for a patch of changed fields first and falls back to
+    # full regeneration when the patch is invalid.
+    REFINEMENT_PATCH_MODE: bool = True
+
+    # Session-wide refinement: parallel agent calls per request and how
+    # many finished edits are committed per bulk insert.
+    REFINEMENT_BATCH_CONCURRENCY: int = 6
+    REFINEMENT_BATCH_FLUSH_SIZE: int = 5
+
+    # Per-worker read-through cache for question reads. Writes record an
+    # invalidation in a SQLite file shared by the workers on this host, which
+    # every cache hit checks; the TTL only bounds staleness across hosts.
+    QUESTION_CACHE_TTL_SECONDS: int = 300
+    QUESTION_CACHE_MAX_ENTRIES: int = 2048
+    QUESTION_CACHE_DB_PATH: str = ".cache/question_reads.sqlite3"
+
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+
+    # Admission control for LLM-heavy routes, shared by all workers on a host.
+    # Bucket capacity and refill are in requested questions.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_DB_PATH: str = ".cache/admission.sqlite3"
+    ADMISSION_MAX_CONCURRENCY: int = 8
+    ADMISSION_BUCKET_CAPACITY: float = 100
+    ADMISSION_REFILL_PER_SECOND: float = 1.0
+    ADMISSION_MAX_QUEUE: int = 32
+    ADMISSION_MAX_WAIT_SECONDS: float = 10.0
+    ADMISSION_LEASE_TTL_SECONDS: float = 600
+    ADMISSION_SESSION_REFINEMENT_WEIGHT: float = 20
+    # A batch upload is charged per PDF and holds its lease until the
+    # background ingestion finishes.
+    ADMISSION_BATCH_FILE_WEIGHT: float = 1
 
     model_config = SettingsConfigDict(env_file=".env")
 
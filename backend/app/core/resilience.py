@@ -0,0 +1,218 @@
+import math
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+from tenacity import (
+    RetryCallState,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_before_delay,
+    wait_random_exponential,
+)
+
+from app.core.config import settings
+from app.core.logger import logger
+
+T = TypeVar("T")
+
+
+class DependencyUnavailable(RuntimeError):
+    """A dependency kept failing transiently; callers should answer 503."""
+
+    def __init__(self, dependency: str, message: str, retry_after: float = 1):
+        super().__init__(f"{dependency} unavailable: {message}")
+        self.dependency = dependency
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class CircuitOpenError(DependencyUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and rejects
+    calls for `reset_seconds`. Then one probe call is let through (half-open):
+    success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, name: str, *, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return "open"
+            return "half_open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_seconds - (time.monotonic() - self._opened_at)
+            if remaining <= 0 and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError(
+            self.name, "circuit open", retry_after=max(remaining, 1)
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit for {self.name} closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Frees the half-open slot when a probe ends without an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._probing = False
+                logger.warning(
+                    f"Circuit for {self.name} opened after {self._failures} "
+                    f"consecutive failures; rejecting calls for {self.reset_seconds}s"
+                )
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of calls so a brownout cannot multiply load.
+    Every call deposits `ratio` tokens (up to `max_tokens`); a retry spends one.
+    """
+
+    def __init__(self, *, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Dependency:
+    """
+    Guards calls to one external service. `is_transient` picks out failures
+    worth retrying (transport errors, timeouts, 5xx); anything else, such as
+    a 4xx or a schema error, is raised at once and counts as the service
+    being up. Non-idempotent calls are only retried when `is_unsent` says the
+    request never reached the service.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        is_transient: Callable[[BaseException], bool],
+        is_unsent: Optional[Callable[[BaseException], bool]] = None,
+    ):
+        self.name = name
+        self.is_transient = is_transient
+        self.is_unsent = is_unsent or (lambda e: False)
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+        )
+        self.budget = RetryBudget(
+            ratio=settings.RETRY_BUDGET_RATIO,
+            max_tokens=settings.RETRY_BUDGET_MAX_TOKENS,
+        )
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        *,
+        idempotent: bool = True,
+        deadline: Optional[float] = None,
+    ) -> T:
+        """
+        Runs `fn` through the breaker, retrying transient failures with
+        jittered exponential backoff while attempts, `deadline` (seconds) and
+        the retry budget allow. A failure that stays transient is raised as
+        DependencyUnavailable.
+        """
+        self.budget.deposit()
+
+        def should_retry(e: BaseException) -> bool:
+            if isinstance(e, CircuitOpenError) or not self.is_transient(e):
+                return False
+            if not idempotent and not self.is_unsent(e):
+                return False
+            return self.budget.withdraw()
+
+        def log_retry(state: RetryCallState) -> None:
+            error = state.outcome.exception() if state.outcome else None
+            delay = state.next_action.sleep if state.next_action else 0
+            logger.warning(
+                f"{self.name} call failed ({type(error).__name__}: {error}); "
+                f"retry {state.attempt_number} in {round(delay, 2)}s"
+            )
+
+        stop = stop_after_attempt(settings.RESILIENCE_MAX_ATTEMPTS)
+        if deadline is not None:
+            stop = stop | stop_before_delay(deadline)
+
+        retrying = Retrying(
+            stop=stop,
+            wait=wait_random_exponential(
+                multiplier=settings.RESILIENCE_BACKOFF_BASE_SECONDS,
+                max=settings.RESILIENCE_BACKOFF_MAX_SECONDS,
+            ),
+            retry=retry_if_exception(should_retry),
+            before_sleep=log_retry,
+            reraise=True,
+        )
+        try:
+            return retrying(self._attempt, fn)
+        except DependencyUnavailable:
+            raise
+        except Exception as e:
+            if self.is_transient(e):
+                raise DependencyUnavailable(self.name, str(e)) from e
+            raise
+
+    def _attempt(self, fn: Callable[[], T]) -> T:
+        self.breaker.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            if self.is_transient(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        self.breaker.record_success()
+        return result
@@ -0,0 +1,108 @@
+import time
+from typing import Callable, List, Tuple
+
+from app.core.logger import logger
+
+
+def _llm_client() -> None:
+    from app.ai.client import get_ai_client
+
+    get_ai_client()
+
+
+def _supabase_clients() -> None:
+    from app.db.client import get_supabase_client, get_supabase_storage_client
+
+    get_supabase_client()
+    get_supabase_storage_client()
+
+
+def _validators() -> None:
+    from app.schemas.document import QUESTION_GENERATION_SCHEMA
+    from app.schemas.refinement import (
+        QUESTION_REFINEMENT_PATCH_SCHEMA,
+        QUESTION_REFINEMENT_SCHEMA,
+    )
+    from app.schemas.similar import SIMILAR_DIRECT_SCHEMA
+    from app.utils.json import get_validator
+
+    for schema in (
+        QUESTION_GENERATION_SCHEMA,
+        QUESTION_REFINEMENT_SCHEMA,
+        QUESTION_REFINEMENT_PATCH_SCHEMA,
+        SIMILAR_DIRECT_SCHEMA,
+    ):
+        get_validator(schema)
+
+
+def _tokenizer() -> None:
+    from app.ai.tokens import _encoder
+
+    _encoder()
+
+
+def _numpy() -> None:
+    import numpy  # noqa: F401
+
+
+def _orchestrations() -> None:
+    from app.api.deps.orchestration import (
+        get_document_orchestration,
+        get_refinement_orchestration,
+        get_similar_orchestration,
+    )
+
+    get_document_orchestration()
+    get_similar_orchestration()
+    get_refinement_orchestration()
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("llm_client", _llm_client),
+    ("supabase", _supabase_clients),
+    ("validators", _validators),
+    ("tokenizer", _tokenizer),
+    ("numpy", _numpy),
+    ("orchestrations", _orchestrations),
+]
+
+
+def check_embedding_dim() -> None:
+    """
+    Refuses to start when the database's embedding columns do not match
+    EMBEDDING_DIM, since every insert and search would fail. An unreachable
+    database or a missing embedding_dim() RPC only logs a warning.
+    """
+    from app.core.config import settings
+    from app.db.repositories.chunks import get_embedding_dim
+
+    try:
+        column_dim = get_embedding_dim()
+    except Exception as e:
+        logger.warning(f"Could not check the embedding column size: {e}")
+        return
+    if column_dim != settings.EMBEDDING_DIM:
+        raise RuntimeError(
+            f"EMBEDDING_DIM is {settings.EMBEDDING_DIM} but the embedding "
+            f"columns are halfvec({column_dim}); run "
+            f"`select public.set_embedding_dim({settings.EMBEDDING_DIM});` "
+            f"or set EMBEDDING_DIM={column_dim}"
+        )
+
+
+def warm_up() -> None:
+    """
+    Pays the lazy-import and client set-up costs before the worker takes
+    traffic. A failing step is logged and skipped; the first request that
+    needs it pays instead.
+    """
+    started = time.perf_counter()
+    for name, step in WARMUP_STEPS:
+        t0 = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+            continue
+        logger.info(f"Warm-up {name}: {(time.perf_counter() - t0) * 1000:.0f} ms")
+    logger.info(f"Warm-up done in {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -1,11 +1,36 @@
-import base64
-import json
-from supabase import Client, create_client
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional
 
 from app.core.config import settings
+from app.core.resilience import Dependency
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+# PostgREST codes for a lost or busy database (PGRST00x), and Postgres
+# connection, shutdown, timeout and serialization failures.
+_TRANSIENT_DB_CODES = {
+    "PGRST000",
+    "PGRST001",
+    "PGRST002",
+    "40001",
+    "40P01",
+    "53300",
+    "57014",
+    "57P01",
+    "57P03",
+}
+
+
+def new_supabase_client() -> Client:
+    """
+    A private client. Auth flows (sign up/in/out) store the user's session on
+    the client they run on, so they must never use the shared one.
+    """
+    from supabase import create_client
 
-def get_supabase_client() -> Client:
     URL = settings.SUPABASE_URL
     KEY = settings.SUPABASE_KEY
 
@@ -16,7 +41,15 @@ def get_supabase_client() -> Client:
     return supabase
 
 
+@lru_cache(maxsize=1)
+def get_supabase_client() -> Client:
+    """One pooled client per process for data access and token checks."""
+    return new_supabase_client()
+
+
+@lru_cache(maxsize=1)
 def get_supabase_storage_client() -> Client:
+    from supabase import create_client
 
     URL = settings.SUPABASE_URL
     KEY = settings.SUPABASE_STORAGE_KEY
@@ -27,3 +60,46 @@ def get_supabase_storage_client() -> Client:
         )
     supabase = create_client(URL, KEY)
     return supabase
+
+
+def _supabase_unsent(e: BaseException) -> bool:
+    import httpx
+
+    return isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def _supabase_transient(e: BaseException) -> bool:
+    import httpx
+    from postgrest.exceptions import APIError
+    from storage3.exceptions import StorageApiError
+    from supabase_auth.errors import AuthRetryableError
+
+    if isinstance(e, (httpx.TransportError, AuthRetryableError)):
+        return True
+    if isinstance(e, APIError):
+        # Non-JSON error bodies (gateway errors) carry the HTTP status as an
+        # int code; JSON bodies carry a PostgREST or SQLSTATE string.
+        if isinstance(e.code, int):
+            return e.code >= 500
+        code = e.code or ""
+        return code in _TRANSIENT_DB_CODES or code.startswith("08")
+    if isinstance(e, StorageApiError):
+        return str(e.status).isdigit() and int(e.status) >= 500
+    return False
+
+
+supabase_dependency = Dependency(
+    "supabase", is_transient=_supabase_transient, is_unsent=_supabase_unsent
+)
+
+
+def execute(query: Any, *, idempotent: Optional[bool] = None) -> Any:
+    """
+    Executes a PostgREST query through the Supabase breaker and retries.
+    Reads, updates and deletes are retried on any transient failure; inserts
+    and RPCs (POST) only when the request never left, unless the caller
+    marks them idempotent.
+    """
+    if idempotent is None:
+        idempotent = query.request.http_method != "POST"
+    return supabase_dependency.call(query.execute, idempotent=idempotent)
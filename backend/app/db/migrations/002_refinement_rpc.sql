@@ -0,0 +1,75 @@
+-- ============================================================
+-- Refinement RPCs
+-- Load a question with its latest version in one call, and commit
+-- the next version atomically so concurrent refinements never
+-- collide on (question_id, version).
+-- ============================================================
+
+-- ============================================================
+-- RPC: question + latest version
+-- ============================================================
+create or replace function public.get_question_for_refinement(
+  p_question_id uuid
+)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'question', to_jsonb(q),
+    'latest_version', (
+      select to_jsonb(v)
+      from public.question_versions v
+      where v.question_id = q.id
+      order by v.version desc
+      limit 1
+    )
+  )
+  from public.questions q
+  where q.id = p_question_id;
+$$;
+
+-- ============================================================
+-- RPC: assign next version and insert it
+-- p_seed_content is stored as version 1 ('__seed__') when the
+-- question has no history yet.
+-- ============================================================
+create or replace function public.commit_question_version(
+  p_question_id uuid,
+  p_user_id uuid,
+  p_instruction text,
+  p_content jsonb,
+  p_seed_content jsonb default null
+)
+returns setof public.question_versions
+language plpgsql
+as $$
+declare
+  v_latest int;
+begin
+  -- Row lock on the parent question serializes concurrent commits.
+  perform 1 from public.questions where id = p_question_id for update;
+  if not found then
+    raise exception 'question % not found', p_question_id;
+  end if;
+
+  select coalesce(max(version), 0) into v_latest
+  from public.question_versions
+  where question_id = p_question_id;
+
+  if v_latest = 0 and p_seed_content is not null then
+    insert into public.question_versions
+      (question_id, user_id, version, instruction, content)
+    values
+      (p_question_id, p_user_id, 1, '__seed__', p_seed_content);
+    v_latest := 1;
+  end if;
+
+  return query
+  insert into public.question_versions
+    (question_id, user_id, version, instruction, content)
+  values
+    (p_question_id, p_user_id, v_latest + 1, p_instruction, p_content)
+  returning *;
+end;
+$$;
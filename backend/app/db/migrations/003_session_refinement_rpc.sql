@@ -0,0 +1,70 @@
+-- ============================================================
+-- Session-wide refinement RPCs
+-- Builds on 002_refinement_rpc.sql.
+-- ============================================================
+
+-- ============================================================
+-- RPC: every question of a session with its latest version
+-- ============================================================
+create or replace function public.get_session_questions_for_refinement(
+  p_session_id uuid,
+  p_user_id uuid,
+  p_question_ids uuid[] default null
+)
+returns table (
+  question jsonb,
+  latest_version jsonb
+)
+language sql
+stable
+as $$
+  select
+    to_jsonb(q) as question,
+    (
+      select to_jsonb(v)
+      from public.question_versions v
+      where v.question_id = q.id
+      order by v.version desc
+      limit 1
+    ) as latest_version
+  from public.questions q
+  where q.session_id = p_session_id
+    and q.user_id = p_user_id
+    and (p_question_ids is null or q.id = any(p_question_ids))
+  order by q.created_at, q.id;
+$$;
+
+-- ============================================================
+-- RPC: commit next versions for many questions in one transaction
+-- p_items: [{"question_id": uuid, "content": {...}, "seed_content": {...}|null}]
+-- Items are locked in question_id order so concurrent batches
+-- cannot deadlock against each other.
+-- ============================================================
+create or replace function public.commit_question_versions(
+  p_user_id uuid,
+  p_instruction text,
+  p_items jsonb
+)
+returns setof public.question_versions
+language plpgsql
+as $$
+declare
+  v_item jsonb;
+begin
+  for v_item in
+    select value
+    from jsonb_array_elements(p_items)
+    order by value->>'question_id'
+  loop
+    return query
+    select *
+    from public.commit_question_version(
+      (v_item->>'question_id')::uuid,
+      p_user_id,
+      p_instruction,
+      v_item->'content',
+      nullif(v_item->'seed_content', 'null'::jsonb)
+    );
+  end loop;
+end;
+$$;
@@ -0,0 +1,47 @@
+-- ============================================================
+-- Session summaries for the dashboard
+-- One row per session with its question count, paged by
+-- (created_at, id) so the cost of a page does not depend on how
+-- many questions the user has.
+-- ============================================================
+
+create index if not exists sessions_user_created_at_id_idx
+on public.sessions(user_id, created_at desc, id desc);
+
+create or replace function public.get_session_summaries(
+  p_user_id uuid,
+  p_limit int default 20,
+  p_before_created_at timestamptz default null,
+  p_before_id uuid default null
+)
+returns table (
+  session_id uuid,
+  question_type text,
+  source_type text,
+  quantity bigint,
+  created_at timestamptz
+)
+language sql
+stable
+as $$
+  select
+    s.id as session_id,
+    s.question_type,
+    s.source_type,
+    qc.quantity,
+    s.created_at
+  from public.sessions s
+  cross join lateral (
+    select count(*) as quantity
+    from public.questions q
+    where q.session_id = s.id
+  ) qc
+  where s.user_id = p_user_id
+    and qc.quantity > 0
+    and (
+      p_before_created_at is null
+      or (s.created_at, s.id) < (p_before_created_at, p_before_id)
+    )
+  order by s.created_at desc, s.id desc
+  limit p_limit;
+$$;
@@ -0,0 +1,59 @@
+-- ============================================================
+-- Generate more questions from an already ingested document
+-- doc_chunks.used_count tracks how many generations drew on a
+-- chunk so follow-up batches can prefer fresh material.
+-- ============================================================
+
+alter table public.doc_chunks
+  add column if not exists used_count int not null default 0;
+
+-- ============================================================
+-- RPC: vector search in doc_chunks (replaces 001 version)
+-- ============================================================
+drop function if exists public.match_doc_chunks(uuid, uuid, vector, int);
+
+create or replace function public.match_doc_chunks(
+  p_user_id uuid,
+  p_document_id uuid,
+  p_query_embedding vector(1536),
+  p_match_count int default 6,
+  p_unused_only boolean default false
+)
+returns table (
+  id uuid,
+  content text,
+  chunk_index int,
+  similarity double precision
+)
+language sql
+stable
+as $$
+  select
+    c.id,
+    c.content,
+    c.chunk_index,
+    1 - (c.embedding <=> p_query_embedding) as similarity
+  from public.doc_chunks c
+  where c.user_id = p_user_id
+    and c.document_id = p_document_id
+    and c.embedding is not null
+    and (not p_unused_only or c.used_count = 0)
+  order by c.embedding <=> p_query_embedding
+  limit p_match_count;
+$$;
+
+-- ============================================================
+-- RPC: mark chunks as used by a generation
+-- ============================================================
+create or replace function public.mark_doc_chunks_used(
+  p_user_id uuid,
+  p_chunk_ids uuid[]
+)
+returns void
+language sql
+as $$
+  update public.doc_chunks
+  set used_count = used_count + 1
+  where user_id = p_user_id
+    and id = any(p_chunk_ids);
+$$;
@@ -0,0 +1,82 @@
+-- ============================================================
+-- Semantic search over a user's question bank
+-- question_text is embedded at insert time; an HNSW index keeps
+-- top-k lookups flat as the bank grows.
+-- ============================================================
+
+alter table public.questions
+  add column if not exists embedding vector(1536);
+
+create index if not exists questions_embedding_hnsw_idx
+on public.questions using hnsw (embedding vector_cosine_ops)
+where embedding is not null;
+
+-- ============================================================
+-- RPC: top-k questions for a query embedding
+-- Iterative index scans (pgvector >= 0.8) keep returning
+-- candidates until p_match_count rows survive the user filter;
+-- the setting is only applied when the installed version has
+-- it. relaxed_order may return hits slightly out of order, so
+-- they are re-sorted.
+-- ============================================================
+create or replace function public.search_questions(
+  p_user_id uuid,
+  p_query_embedding vector(1536),
+  p_match_count int default 20
+)
+returns table (
+  id uuid,
+  user_id uuid,
+  session_id uuid,
+  document_id uuid,
+  source_type text,
+  question_type text,
+  question_text text,
+  options jsonb,
+  correct_answer text,
+  explanation text,
+  tags jsonb,
+  confidence_score double precision,
+  created_at timestamptz,
+  similarity double precision
+)
+language plpgsql
+as $$
+begin
+  -- hnsw.iterative_scan only exists from pgvector 0.8 on; setting it on
+  -- an older version raises, so check the installed extension first.
+  if (
+    select string_to_array(extversion, '.')::int[] >= array[0, 8]
+    from pg_extension
+    where extname = 'vector'
+  ) then
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+  end if;
+  perform set_config('hnsw.ef_search', greatest(40, p_match_count * 2)::text, true);
+
+  return query
+  with hits as materialized (
+    select
+      q.id,
+      q.user_id,
+      q.session_id,
+      q.document_id,
+      q.source_type,
+      q.question_type,
+      q.question_text,
+      q.options,
+      q.correct_answer,
+      q.explanation,
+      q.tags,
+      q.confidence_score,
+      q.created_at,
+      1 - (q.embedding <=> p_query_embedding) as similarity
+    from public.questions q
+    where q.user_id = p_user_id
+      and q.embedding is not null
+    order by q.embedding <=> p_query_embedding
+    limit p_match_count
+  )
+  select * from hits h order by h.similarity desc;
+end;
+$$;
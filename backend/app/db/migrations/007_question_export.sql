@@ -0,0 +1,71 @@
+-- ============================================================
+-- Bulk export of a user's questions
+-- Pages by (created_at, id) so each page is an index range scan
+-- no matter how far into the bank the export is.
+-- ============================================================
+
+create index if not exists questions_user_created_at_id_idx
+on public.questions(user_id, created_at, id);
+
+create index if not exists questions_session_created_at_id_idx
+on public.questions(session_id, created_at, id);
+
+-- ============================================================
+-- RPC: one export page, oldest first, with refined content
+-- The latest question_versions row (if any) overrides the
+-- originally generated fields.
+-- ============================================================
+create or replace function public.export_questions(
+  p_user_id uuid,
+  p_session_id uuid default null,
+  p_after_created_at timestamptz default null,
+  p_after_id uuid default null,
+  p_limit int default 500
+)
+returns table (
+  id uuid,
+  session_id uuid,
+  document_id uuid,
+  source_type text,
+  question_type text,
+  question_text text,
+  options jsonb,
+  correct_answer text,
+  explanation text,
+  tags jsonb,
+  version int,
+  created_at timestamptz
+)
+language sql
+stable
+as $$
+  select
+    q.id,
+    q.session_id,
+    q.document_id,
+    q.source_type,
+    coalesce(lv.content->>'question_type', q.question_type),
+    coalesce(lv.content->>'question_text', q.question_text),
+    case when lv.content is null then q.options else lv.content->'options' end,
+    coalesce(lv.content->>'correct_answer', q.correct_answer),
+    coalesce(lv.content->>'explanation', q.explanation),
+    case when lv.content is null then q.tags else lv.content->'tags' end,
+    coalesce(lv.version, 0),
+    q.created_at
+  from public.questions q
+  left join lateral (
+    select v.content, v.version
+    from public.question_versions v
+    where v.question_id = q.id
+    order by v.version desc
+    limit 1
+  ) lv on true
+  where q.user_id = p_user_id
+    and (p_session_id is null or q.session_id = p_session_id)
+    and (
+      p_after_created_at is null
+      or (q.created_at, q.id) > (p_after_created_at, p_after_id)
+    )
+  order by q.created_at, q.id
+  limit p_limit;
+$$;
@@ -0,0 +1,80 @@
+-- ============================================================
+-- Chunk offsets instead of duplicated chunk text
+-- doc_chunks rows may hold (start_offset, end_offset) into
+-- documents.extracted_text instead of their own content; with
+-- overlapping chunks that halves the stored and transferred text.
+-- Rows written before this migration keep their content.
+-- ============================================================
+
+alter table public.doc_chunks
+  add column if not exists start_offset int,
+  add column if not exists end_offset int,
+  alter column content drop not null;
+
+do $$
+begin
+  if not exists (
+    select 1 from pg_constraint where conname = 'doc_chunks_content_or_offsets'
+  ) then
+    alter table public.doc_chunks
+      add constraint doc_chunks_content_or_offsets
+      check (
+        content is not null
+        or (start_offset is not null and end_offset >= start_offset)
+      );
+  end if;
+end;
+$$;
+
+-- The single copy of the text; lz4 (PG14+) applies to values written
+-- from now on and decompresses faster than the default pglz.
+alter table public.documents
+  alter column extracted_text set compression lz4;
+
+-- ============================================================
+-- RPC: vector search in doc_chunks (replaces 005 version)
+-- Content is materialized from the document text. Assigning it
+-- to a variable decompresses it once instead of once per chunk.
+-- ============================================================
+create or replace function public.match_doc_chunks(
+  p_user_id uuid,
+  p_document_id uuid,
+  p_query_embedding vector(1536),
+  p_match_count int default 6,
+  p_unused_only boolean default false
+)
+returns table (
+  id uuid,
+  content text,
+  chunk_index int,
+  similarity double precision
+)
+language plpgsql
+stable
+as $$
+declare
+  v_text text;
+begin
+  select d.extracted_text into v_text
+  from public.documents d
+  where d.id = p_document_id
+    and d.user_id = p_user_id;
+
+  return query
+  select
+    c.id,
+    coalesce(
+      c.content,
+      substr(v_text, c.start_offset + 1, c.end_offset - c.start_offset)
+    ),
+    c.chunk_index,
+    1 - (c.embedding <=> p_query_embedding) as similarity
+  from public.doc_chunks c
+  where c.user_id = p_user_id
+    and c.document_id = p_document_id
+    and c.embedding is not null
+    and (not p_unused_only or c.used_count = 0)
+  order by c.embedding <=> p_query_embedding
+  limit p_match_count;
+end;
+$$;
@@ -0,0 +1,191 @@
+-- ============================================================
+-- Compact embedding storage
+-- Embeddings are stored as halfvec (float16, pgvector >= 0.7):
+-- half the heap and index size of vector(1536) at no measurable
+-- recall cost for cosine search. Questions also get an HNSW index
+-- on the binary-quantized vectors (1 bit per dimension) that
+-- search_questions can use for candidates before re-ranking.
+-- ============================================================
+
+-- Per-document chunk search filters to one document's rows, so it
+-- scans them exactly through doc_chunks_document_id_idx. The
+-- approximate index only cost recall there (rows of other
+-- documents used up the probed lists).
+drop index if exists public.doc_chunks_embedding_ivfflat_idx;
+
+alter table public.doc_chunks
+  alter column embedding type halfvec(1536)
+  using embedding::halfvec(1536);
+
+drop index if exists public.questions_embedding_hnsw_idx;
+
+alter table public.questions
+  alter column embedding type halfvec(1536)
+  using embedding::halfvec(1536);
+
+create index if not exists questions_embedding_hnsw_idx
+on public.questions using hnsw (embedding halfvec_cosine_ops)
+where embedding is not null;
+
+create index if not exists questions_embedding_bq_hnsw_idx
+on public.questions using hnsw (
+  (binary_quantize(embedding)::bit(1536)) bit_hamming_ops
+)
+where embedding is not null;
+
+-- ============================================================
+-- RPC: vector search in doc_chunks (replaces 008 version)
+-- ============================================================
+drop function if exists public.match_doc_chunks(uuid, uuid, vector, int, boolean);
+
+create or replace function public.match_doc_chunks(
+  p_user_id uuid,
+  p_document_id uuid,
+  p_query_embedding halfvec(1536),
+  p_match_count int default 6,
+  p_unused_only boolean default false
+)
+returns table (
+  id uuid,
+  content text,
+  chunk_index int,
+  similarity double precision
+)
+language plpgsql
+stable
+as $$
+declare
+  v_text text;
+begin
+  select d.extracted_text into v_text
+  from public.documents d
+  where d.id = p_document_id
+    and d.user_id = p_user_id;
+
+  return query
+  select
+    c.id,
+    coalesce(
+      c.content,
+      substr(v_text, c.start_offset + 1, c.end_offset - c.start_offset)
+    ),
+    c.chunk_index,
+    1 - (c.embedding <=> p_query_embedding) as similarity
+  from public.doc_chunks c
+  where c.user_id = p_user_id
+    and c.document_id = p_document_id
+    and c.embedding is not null
+    and (not p_unused_only or c.used_count = 0)
+  order by c.embedding <=> p_query_embedding
+  limit p_match_count;
+end;
+$$;
+
+-- ============================================================
+-- RPC: top-k questions for a query embedding (replaces 006)
+-- p_rerank_candidates > 0 takes that many nearest candidates by
+-- Hamming distance on the binary index, then re-ranks them by
+-- exact cosine distance on the halfvec column; 0 searches the
+-- halfvec index directly.
+-- ============================================================
+drop function if exists public.search_questions(uuid, vector, int);
+
+create or replace function public.search_questions(
+  p_user_id uuid,
+  p_query_embedding halfvec(1536),
+  p_match_count int default 20,
+  p_rerank_candidates int default 0
+)
+returns table (
+  id uuid,
+  user_id uuid,
+  session_id uuid,
+  document_id uuid,
+  source_type text,
+  question_type text,
+  question_text text,
+  options jsonb,
+  correct_answer text,
+  explanation text,
+  tags jsonb,
+  confidence_score double precision,
+  created_at timestamptz,
+  similarity double precision
+)
+language plpgsql
+as $$
+begin
+  -- hnsw.iterative_scan only exists from pgvector 0.8 on; setting it on
+  -- an older version raises, so check the installed extension first.
+  if (
+    select string_to_array(extversion, '.')::int[] >= array[0, 8]
+    from pg_extension
+    where extname = 'vector'
+  ) then
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+  end if;
+  perform set_config(
+    'hnsw.ef_search',
+    greatest(40, p_match_count * 2, p_rerank_candidates)::text,
+    true
+  );
+
+  if p_rerank_candidates > 0 then
+    return query
+    with candidates as materialized (
+      select q.id
+      from public.questions q
+      where q.user_id = p_user_id
+        and q.embedding is not null
+      order by binary_quantize(q.embedding)::bit(1536)
+        <~> binary_quantize(p_query_embedding)
+      limit p_rerank_candidates
+    )
+    select
+      q.id,
+      q.user_id,
+      q.session_id,
+      q.document_id,
+      q.source_type,
+      q.question_type,
+      q.question_text,
+      q.options,
+      q.correct_answer,
+      q.explanation,
+      q.tags,
+      q.confidence_score,
+      q.created_at,
+      1 - (q.embedding <=> p_query_embedding) as similarity
+    from candidates c
+    join public.questions q on q.id = c.id
+    order by q.embedding <=> p_query_embedding
+    limit p_match_count;
+    return;
+  end if;
+
+  return query
+  with hits as materialized (
+    select
+      q.id,
+      q.user_id,
+      q.session_id,
+      q.document_id,
+      q.source_type,
+      q.question_type,
+      q.question_text,
+      q.options,
+      q.correct_answer,
+      q.explanation,
+      q.tags,
+      q.confidence_score,
+      q.created_at,
+      1 - (q.embedding <=> p_query_embedding) as similarity
+    from public.questions q
+    where q.user_id = p_user_id
+      and q.embedding is not null
+    order by q.embedding <=> p_query_embedding
+    limit p_match_count
+  )
+  select * from hits h order by h.similarity desc;
+end;
+$$;
@@ -0,0 +1,244 @@
+-- ============================================================
+-- Configurable embedding size
+-- set_embedding_dim(n) resizes doc_chunks.embedding and
+-- questions.embedding to halfvec(n) and rebuilds the question
+-- indexes. Run it whenever EMBEDDING_DIM changes:
+--
+--   select public.set_embedding_dim(512);
+--
+-- Shrinking keeps existing vectors: they are cut to the first n
+-- dimensions and re-normalized, which is what Matryoshka models
+-- (text-embedding-3-*) return for `dimensions` = n. Growing
+-- clears them; those rows need re-embedding.
+--
+-- A migration cannot read the app's EMBEDDING_DIM, so this file
+-- leaves the columns at 1536. embedding_dim() reports the current
+-- size; the API refuses to start while it differs from
+-- EMBEDDING_DIM.
+-- ============================================================
+
+create or replace function public.embedding_dim()
+returns int
+language sql
+stable
+as $$
+  select a.atttypmod
+  from pg_attribute a
+  where a.attrelid = 'public.doc_chunks'::regclass
+    and a.attname = 'embedding';
+$$;
+
+create or replace function public.set_embedding_dim(p_dim int)
+returns void
+language plpgsql
+as $$
+declare
+  v_current int;
+  v_using text;
+  v_table text;
+begin
+  if p_dim < 1 or p_dim > 4000 then
+    raise exception 'embedding dimension must be between 1 and 4000 (halfvec HNSW limit), got %', p_dim;
+  end if;
+
+  -- pgvector stores the dimension as the column's typmod.
+  select a.atttypmod into v_current
+  from pg_attribute a
+  where a.attrelid = 'public.doc_chunks'::regclass
+    and a.attname = 'embedding';
+
+  if v_current = p_dim then
+    return;
+  end if;
+
+  if v_current > p_dim then
+    v_using := format('l2_normalize(subvector(embedding, 1, %s))::halfvec(%s)', p_dim, p_dim);
+  else
+    v_using := 'null';
+  end if;
+
+  drop index if exists public.questions_embedding_hnsw_idx;
+  drop index if exists public.questions_embedding_bq_hnsw_idx;
+
+  foreach v_table in array array['doc_chunks', 'questions'] loop
+    execute format(
+      'alter table public.%I alter column embedding type halfvec(%s) using %s',
+      v_table, p_dim, v_using
+    );
+  end loop;
+
+  create index questions_embedding_hnsw_idx
+  on public.questions using hnsw (embedding halfvec_cosine_ops)
+  where embedding is not null;
+
+  execute format(
+    'create index questions_embedding_bq_hnsw_idx on public.questions '
+    'using hnsw ((binary_quantize(embedding)::bit(%s)) bit_hamming_ops) '
+    'where embedding is not null',
+    p_dim
+  );
+end;
+$$;
+
+-- ============================================================
+-- RPC: vector search in doc_chunks (replaces 009 version)
+-- Postgres ignores the size of a function argument type, so the
+-- query is declared as plain halfvec; a query of the wrong size
+-- fails in <=> with "different halfvec dimensions".
+-- ============================================================
+drop function if exists public.match_doc_chunks(uuid, uuid, halfvec, int, boolean);
+
+create or replace function public.match_doc_chunks(
+  p_user_id uuid,
+  p_document_id uuid,
+  p_query_embedding halfvec,
+  p_match_count int default 6,
+  p_unused_only boolean default false
+)
+returns table (
+  id uuid,
+  content text,
+  chunk_index int,
+  similarity double precision
+)
+language plpgsql
+stable
+as $$
+declare
+  v_text text;
+begin
+  select d.extracted_text into v_text
+  from public.documents d
+  where d.id = p_document_id
+    and d.user_id = p_user_id;
+
+  return query
+  select
+    c.id,
+    coalesce(
+      c.content,
+      substr(v_text, c.start_offset + 1, c.end_offset - c.start_offset)
+    ),
+    c.chunk_index,
+    1 - (c.embedding <=> p_query_embedding) as similarity
+  from public.doc_chunks c
+  where c.user_id = p_user_id
+    and c.document_id = p_document_id
+    and c.embedding is not null
+    and (not p_unused_only or c.used_count = 0)
+  order by c.embedding <=> p_query_embedding
+  limit p_match_count;
+end;
+$$;
+
+-- ============================================================
+-- RPC: top-k questions for a query embedding (replaces 009)
+-- The binary candidate query must repeat the index expression,
+-- including its bit(n) size, so it is built for the query's size.
+-- ============================================================
+drop function if exists public.search_questions(uuid, halfvec, int, int);
+
+create or replace function public.search_questions(
+  p_user_id uuid,
+  p_query_embedding halfvec,
+  p_match_count int default 20,
+  p_rerank_candidates int default 0
+)
+returns table (
+  id uuid,
+  user_id uuid,
+  session_id uuid,
+  document_id uuid,
+  source_type text,
+  question_type text,
+  question_text text,
+  options jsonb,
+  correct_answer text,
+  explanation text,
+  tags jsonb,
+  confidence_score double precision,
+  created_at timestamptz,
+  similarity double precision
+)
+language plpgsql
+as $$
+begin
+  -- hnsw.iterative_scan only exists from pgvector 0.8 on; setting it on
+  -- an older version raises, so check the installed extension first.
+  if (
+    select string_to_array(extversion, '.')::int[] >= array[0, 8]
+    from pg_extension
+    where extname = 'vector'
+  ) then
+    perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+  end if;
+  perform set_config(
+    'hnsw.ef_search',
+    greatest(40, p_match_count * 2, p_rerank_candidates)::text,
+    true
+  );
+
+  if p_rerank_candidates > 0 then
+    return query execute format(
+      $sql$
+      with candidates as materialized (
+        select q.id
+        from public.questions q
+        where q.user_id = $1
+          and q.embedding is not null
+        order by binary_quantize(q.embedding)::bit(%1$s)
+          <~> binary_quantize($2)::bit(%1$s)
+        limit $3
+      )
+      select
+        q.id,
+        q.user_id,
+        q.session_id,
+        q.document_id,
+        q.source_type,
+        q.question_type,
+        q.question_text,
+        q.options,
+        q.correct_answer,
+        q.explanation,
+        q.tags,
+        q.confidence_score,
+        q.created_at,
+        1 - (q.embedding <=> $2) as similarity
+      from candidates c
+      join public.questions q on q.id = c.id
+      order by q.embedding <=> $2
+      limit $4
+      $sql$,
+      vector_dims(p_query_embedding)
+    )
+    using p_user_id, p_query_embedding, p_rerank_candidates, p_match_count;
+    return;
+  end if;
+
+  return query
+  with hits as materialized (
+    select
+      q.id,
+      q.user_id,
+      q.session_id,
+      q.document_id,
+      q.source_type,
+      q.question_type,
+      q.question_text,
+      q.options,
+      q.correct_answer,
+      q.explanation,
+      q.tags,
+      q.confidence_score,
+      q.created_at,
+      1 - (q.embedding <=> p_query_embedding) as similarity
+    from public.questions q
+    where q.user_id = p_user_id
+      and q.embedding is not null
+    order by q.embedding <=> p_query_embedding
+    limit p_match_count
+  )
+  select * from hits h order by h.similarity desc;
+end;
+$$;
@@ -1,10 +1,29 @@
-from uuid import UUID
-from typing import Any, Dict, List, Tuple, cast
+from __future__ import annotations
 
-from supabase import Client
+from uuid import UUID
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, cast
 
-from app.db.client import get_supabase_client
+from app.core.config import settings
+from app.db.client import execute, get_supabase_client
 from app.models.chunks import DocChunk
+from app.utils.vector import Vector, vector_literal
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Columns returned from chunk inserts; content and embeddings are never
+# read back.
+CHUNK_COLUMNS = (
+    "id,user_id,session_id,document_id,chunk_index,start_offset,end_offset,"
+    "created_at"
+)
+
+
+def get_embedding_dim(supabase: Client | None = None) -> int:
+    """Size of the halfvec embedding columns (see 010_embedding_dim.sql)."""
+    sb = supabase or get_supabase_client()
+    res = execute(sb.rpc("embedding_dim", {}), idempotent=True)
+    return int(cast(int, res.data))
 
 
 def insert_chunks(
@@ -12,27 +31,39 @@ def insert_chunks(
     session_id: UUID,
     document_id: UUID,
     chunks: List[str],
+    embeddings: Optional[Sequence[Vector]] = None,
+    spans: Optional[List[Tuple[int, int]]] = None,
     supabase: Client | None = None,
 ) -> List[DocChunk]:
     """
-    Inserts chunks with chunk_index and content.
+    Inserts chunks with chunk_index and content, and their embeddings when
+    given (one per chunk) so no per-row update is needed afterwards.
+    With `spans` (offsets into the document's stored extracted_text) and
+    DOC_CHUNK_STORAGE="offsets", rows carry the offsets instead of content.
     Returns inserted rows (including ids).
     """
     sb = supabase or get_supabase_client()
+    use_offsets = spans is not None and settings.DOC_CHUNK_STORAGE == "offsets"
     rows = []
     for i, content in enumerate(chunks):
-        rows.append(
-            {
-                "user_id": str(user_id),
-                "session_id": str(session_id),
-                "document_id": str(document_id),
-                "chunk_index": i,
-                "content": content,
-            }
-        )
+        row: Dict[str, Any] = {
+            "user_id": str(user_id),
+            "session_id": str(session_id),
+            "document_id": str(document_id),
+            "chunk_index": i,
+        }
+        if use_offsets:
+            row["start_offset"], row["end_offset"] = spans[i]
+        else:
+            row["content"] = content
+        if embeddings is not None:
+            row["embedding"] = vector_literal(embeddings[i])
+        rows.append(row)
 
     # Supabase PostgREST insert accepts list for bulk insert
-    res = sb.table("doc_chunks").insert(rows).execute()
+    query = sb.table("doc_chunks").insert(rows)
+    query.request.params = query.request.params.set("select", CHUNK_COLUMNS)
+    res = execute(query)
     if not res.data:
         raise RuntimeError(f"Failed to insert doc_chunks: {res}")
     return [DocChunk.model_validate(row) for row in res.data]
@@ -40,7 +71,7 @@ def insert_chunks(
 
 def update_embeddings(
     user_id: UUID,
-    chunk_id_to_embedding: List[Tuple[UUID, List[float]]],
+    chunk_id_to_embedding: List[Tuple[UUID, Vector]],
     supabase: Client | None = None,
 ) -> int:
     """
@@ -54,13 +85,12 @@ def update_embeddings(
     updated = 0
 
     for chunk_id, embedding in chunk_id_to_embedding:
-        # embedding should be a list[float] matching vector dimension
-        res = (
+        # embedding must match the column dimension
+        res = execute(
             sb.table("doc_chunks")
-            .update({"embedding": embedding})
+            .update({"embedding": vector_literal(embedding)})
             .eq("id", str(chunk_id))
             .eq("user_id", str(user_id))
-            .execute()
         )
         if res.data:
             updated += 1
@@ -71,21 +101,40 @@ def update_embeddings(
 def match_doc_chunks(
     user_id: UUID,
     document_id: UUID,
-    query_embedding: List[float],
+    query_embedding: Vector,
     match_count: int = 6,
+    unused_only: bool = False,
     supabase: Client | None = None,
 ) -> List[Dict[str, Any]]:
     """
-    Calls the SQL RPC function match_doc_chunks defined in document.sql.
-    Returns rows with {id, content, chunk_index, similarity}
+    Calls the SQL RPC function match_doc_chunks (010_embedding_dim.sql).
+    Returns rows with {id, content, chunk_index, similarity}.
+    unused_only restricts matches to chunks no generation has drawn on yet.
     """
     sb = supabase or get_supabase_client()
     payload = {
         "p_user_id": str(user_id),
         "p_document_id": str(document_id),
-        "p_query_embedding": query_embedding,
+        "p_query_embedding": vector_literal(query_embedding),
         "p_match_count": match_count,
+        "p_unused_only": unused_only,
     }
-    res = sb.rpc("match_doc_chunks", payload).execute()
+    res = execute(sb.rpc("match_doc_chunks", payload), idempotent=True)
     # If no matches, data could be [] which is valid
     return cast(List[Dict[str, Any]], res.data or [])
+
+
+def mark_chunks_used(
+    user_id: UUID,
+    chunk_ids: List[UUID],
+    supabase: Client | None = None,
+) -> None:
+    if not chunk_ids:
+        return
+    sb = supabase or get_supabase_client()
+    execute(
+        sb.rpc(
+            "mark_doc_chunks_used",
+            {"p_user_id": str(user_id), "p_chunk_ids": [str(c) for c in chunk_ids]},
+        )
+    )
@@ -1,11 +1,21 @@
-from uuid import UUID
-from typing import Optional
+from __future__ import annotations
 
-from supabase import Client
+from uuid import UUID
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from app.db.client import get_supabase_client
+from app.db.client import execute, get_supabase_client
 from app.models.document import Document
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Every column but the (large) extracted_text, which is written once and only
+# read back by the chunk retrieval RPC.
+DOCUMENT_COLUMNS = (
+    "id,user_id,session_id,filename,storage_path,mime_type,status,"
+    "error_message,created_at"
+)
+
 
 def create_document(
     user_id: UUID,
@@ -25,12 +35,62 @@ def create_document(
         "mime_type": mime_type,
         "status": status,
     }
-    res = sb.table("documents").insert(payload).execute()
+    res = execute(sb.table("documents").insert(payload))
     if not res.data:
         raise RuntimeError(f"Failed to create document: {res}")
     return Document.model_validate(res.data[0])
 
 
+def create_documents(
+    user_id: UUID,
+    documents: List[Dict[str, Any]],
+    status: str = "uploaded",
+    supabase: Client | None = None,
+) -> List[Document]:
+    """
+    Bulk create_document: each item has session_id, filename and storage_path.
+    Returned in the order given (matched on session_id).
+    """
+    sb = supabase or get_supabase_client()
+    payload = [
+        {
+            "user_id": str(user_id),
+            "session_id": str(d["session_id"]),
+            "filename": d["filename"],
+            "storage_path": d["storage_path"],
+            "mime_type": d.get("mime_type", "application/pdf"),
+            "status": status,
+        }
+        for d in documents
+    ]
+    query = sb.table("documents").insert(payload)
+    query.request.params = query.request.params.set("select", DOCUMENT_COLUMNS)
+    res = execute(query)
+    by_session = {str(row["session_id"]): row for row in res.data or []}
+    if len(by_session) != len(payload):
+        raise RuntimeError(f"Failed to create documents: {res}")
+    return [Document.model_validate(by_session[p["session_id"]]) for p in payload]
+
+
+def get_document(
+    user_id: UUID,
+    document_id: UUID,
+    supabase: Client | None = None,
+) -> Optional[Document]:
+    """Fetches a document row without its (large) extracted_text."""
+    sb = supabase or get_supabase_client()
+    res = execute(
+        sb.table("documents")
+        .select(DOCUMENT_COLUMNS)
+        .eq("id", str(document_id))
+        .eq("user_id", str(user_id))
+        .limit(1)
+    )
+    if not res.data:
+        return None
+    return Document.model_validate(res.data[0])
+
+
 def update_extracted_text(
     user_id: UUID,
     document_id: UUID,
@@ -38,13 +98,15 @@ def update_extracted_text(
     supabase: Client | None = None,
 ) -> Document:
     sb = supabase or get_supabase_client()
-    res = (
+    query = (
         sb.table("documents")
         .update({"extracted_text": extracted_text})
         .eq("id", str(document_id))
         .eq("user_id", str(user_id))
-        .execute()
     )
+    # Don't echo the text back.
+    query.request.params = query.request.params.set("select", DOCUMENT_COLUMNS)
+    res = execute(query)
     if not res.data:
         raise RuntimeError(
             f"Failed to update extracted_text for document {document_id}"
@@ -61,13 +123,14 @@ def update_document_status(
 ) -> Document:
     sb = supabase or get_supabase_client()
     payload = {"status": status, "error_message": error_message}
-    res = (
+    query = (
         sb.table("documents")
         .update(payload)
         .eq("id", str(document_id))
         .eq("user_id", str(user_id))
-        .execute()
     )
+    query.request.params = query.request.params.set("select", DOCUMENT_COLUMNS)
+    res = execute(query)
     if not res.data:
         raise RuntimeError(f"Failed to update status for document {document_id}")
     return Document.model_validate(res.data[0])
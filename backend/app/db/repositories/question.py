@@ -1,10 +1,170 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Any, Dict, List, Literal, Optional, cast
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Sequence, cast
 from uuid import UUID
-from app.db.client import get_supabase_client
+
+import orjson
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.db.client import execute, get_supabase_client
 from app.models.question import Question
+from app.utils.sqlite import connect_local_db
+from app.utils.vector import Vector, vector_literal
+
+# Explicit projection for question reads, so wide columns added later are
+# never shipped unless a caller asks for them.
+QUESTION_COLUMNS = (
+    "id,user_id,session_id,document_id,source_type,question_type,question_text,"
+    "options,correct_answer,explanation,tags,confidence_score,created_at"
+)
+
+
+@dataclass(frozen=True)
+class CachedRead:
+    """A read result together with its serialized body and validators."""
+
+    data: Any
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+
+
+class _ReadInvalidations:
+    """
+    Invalidation stamps for the read cache, kept in a SQLite file shared by
+    every worker on the host so a write in one worker evicts the cached reads
+    of all of them. An entry is stale when its key was invalidated after the
+    entry's load started.
+    """
+
+    def __init__(self, *, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_local_db(self.path)
+            conn.execute(
+                """
+                create table if not exists read_invalidations (
+                  key text primary key,
+                  invalidated_at real not null
+                )
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    def is_stale(self, key: str, loaded_at: float) -> bool:
+        try:
+            row = self._conn().execute(
+                "select invalidated_at from read_invalidations where key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Question read invalidation lookup failed: {e}")
+            return True
+        return row is not None and row[0] >= loaded_at
+
+    def invalidate(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute("begin immediate")
+            try:
+                conn.executemany(
+                    "insert or replace into read_invalidations "
+                    "(key, invalidated_at) values (?, ?)",
+                    [(key, now) for key in keys],
+                )
+                # Entries loaded before this have expired from every cache.
+                conn.execute(
+                    "delete from read_invalidations where invalidated_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+                conn.execute("commit")
+            except BaseException:
+                conn.execute("rollback")
+                raise
+        except sqlite3.Error as e:
+            logger.error(f"Question read invalidation failed for {keys}: {e}")
+
+
+_read_cache: TTLCache = TTLCache(
+    maxsize=settings.QUESTION_CACHE_MAX_ENTRIES,
+    ttl=settings.QUESTION_CACHE_TTL_SECONDS,
+)
+_read_cache_lock = threading.Lock()
+_invalidations = _ReadInvalidations(
+    path=settings.QUESTION_CACHE_DB_PATH,
+    ttl_seconds=settings.QUESTION_CACHE_TTL_SECONDS,
+)
+
+
+def _cache_key(key: tuple[str, str]) -> str:
+    return f"{key[0]}:{key[1]}"
+
+
+def _last_modified(data: Any) -> Optional[datetime]:
+    rows = data if isinstance(data, list) else [data] if data else []
+    stamps = [r["created_at"] for r in rows if r.get("created_at")]
+    if not stamps:
+        return None
+    return max(
+        datetime.fromisoformat(str(ts)).astimezone(timezone.utc) for ts in stamps
+    )
+
+
+def _build_read(data: Any) -> CachedRead:
+    body = orjson.dumps(data)
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return CachedRead(
+        data=data, body=body, etag=etag, last_modified=_last_modified(data)
+    )
+
+
+def _read_through(key: tuple[str, str], loader: Callable[[], Any]) -> CachedRead:
+    with _read_cache_lock:
+        cached = _read_cache.get(key)
+    if cached is not None:
+        loaded_at, entry = cached
+        if not _invalidations.is_stale(_cache_key(key), loaded_at):
+            return entry
+
+    loaded_at = time.time()
+    entry = _build_read(loader())
+    if entry.data:
+        with _read_cache_lock:
+            _read_cache[key] = (loaded_at, entry)
+    return entry
+
+
+def invalidate_question_reads(
+    *,
+    question_ids: Iterable[Any] = (),
+    session_ids: Iterable[Any] = (),
+) -> None:
+    keys: List[tuple[str, str]] = []
+    for qid in question_ids:
+        keys += [("question", str(qid)), ("versions", str(qid))]
+    for sid in session_ids:
+        keys.append(("session", str(sid)))
+
+    with _read_cache_lock:
+        for key in keys:
+            _read_cache.pop(key, None)
+    _invalidations.invalidate([_cache_key(key) for key in keys])
 
 
 def insert_questions(
@@ -14,36 +174,46 @@ def insert_questions(
     document_id: Optional[UUID] = None,
     questions: List[Dict[str, Any]],
     source_type: Literal["document", "similarity"] = "document",
+    embeddings: Optional[Sequence[Vector]] = None,
 ) -> List[Dict[str, Any]]:
+    """`embeddings`, when given, holds one question_text embedding per question."""
     sb = get_supabase_client()
 
     rows: List[Dict[str, Any]] = []
-    for q in questions:
-        rows.append(
-            {
-                "user_id": str(user_id),
-                "session_id": str(session_id),
-                "document_id": str(document_id) if document_id else None,
-                "source_type": source_type,
-                "question_type": q["question_type"],
-                "question_text": q["question_text"],
-                "options": q.get("options"),
-                "correct_answer": q["correct_answer"],
-                "explanation": q["explanation"],
-                "tags": q.get("tags"),
-                "confidence_score": q.get("confidence_score"),
-            }
-        )
+    for i, q in enumerate(questions):
+        row: Dict[str, Any] = {
+            "user_id": str(user_id),
+            "session_id": str(session_id),
+            "document_id": str(document_id) if document_id else None,
+            "source_type": source_type,
+            "question_type": q["question_type"],
+            "question_text": q["question_text"],
+            "options": q.get("options"),
+            "correct_answer": q["correct_answer"],
+            "explanation": q["explanation"],
+            "tags": q.get("tags"),
+            "confidence_score": q.get("confidence_score"),
+        }
+        if embeddings is not None:
+            row["embedding"] = vector_literal(embeddings[i])
+        rows.append(row)
 
-    res = sb.table("questions").insert(rows).execute()
+    query = sb.table("questions").insert(rows)
+    # Return only the API columns; the embedding stays in the database.
+    query.request.params = query.request.params.set("select", QUESTION_COLUMNS)
+    res = execute(query)
     data = cast(List[Dict[str, Any]], res.data or [])
+    invalidate_question_reads(session_ids=[session_id])
     return data
 
 
 def get_question_by_id(question_id: UUID) -> Optional[Dict[str, Any]]:
     sb = get_supabase_client()
-    res = (
-        sb.table("questions").select("*").eq("id", str(question_id)).limit(1).execute()
+    res = execute(
+        sb.table("questions")
+        .select(QUESTION_COLUMNS)
+        .eq("id", str(question_id))
+        .limit(1)
     )
     data = cast(list[dict[str, Any]], res.data or [])
     return data[0] if data else None
@@ -51,13 +221,12 @@ def get_question_by_id(question_id: UUID) -> Optional[Dict[str, Any]]:
 
 def get_latest_question_version(question_id: UUID) -> Optional[Dict[str, Any]]:
     sb = get_supabase_client()
-    res = (
+    res = execute(
         sb.table("question_versions")
         .select("*")
         .eq("question_id", str(question_id))
         .order("version", desc=True)
         .limit(1)
-        .execute()
     )
     data = cast(list[dict[str, Any]], res.data or [])
     return data[0] if data else None
@@ -72,7 +241,7 @@ def insert_question_version(
     content: Dict[str, Any],
 ) -> Dict[str, Any]:
     sb = get_supabase_client()
-    res = (
+    res = execute(
         sb.table("question_versions")
         .insert(
             {
@@ -83,73 +252,266 @@ def insert_question_version(
                 "content": content,
             }
         )
-        .execute()
-    )
-    res = (
-        sb.table("question_versions")
-        .select("*")
-        .eq("question_id", str(question_id))
-        .eq("version", version)
-        .limit(1)
-        .execute()
     )
     rows = cast(list[dict[str, Any]], res.data or [])
+    invalidate_question_reads(question_ids=[question_id])
+    if not rows:
+        raise RuntimeError(f"Failed to insert version {version} for {question_id}")
+    return rows[0]
+
 
+def get_question_for_refinement(
+    question_id: UUID,
+) -> tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Returns (question, latest_version) in a single round trip.
+    Calls the SQL RPC get_question_for_refinement defined in 002_refinement_rpc.sql.
+    """
+    sb = get_supabase_client()
+    res = execute(
+        sb.rpc("get_question_for_refinement", {"p_question_id": str(question_id)}),
+        idempotent=True,
+    )
+    data = cast(Optional[Dict[str, Any]], res.data)
+    if not data:
+        return None, None
+    return data.get("question"), data.get("latest_version")
+
+
+def commit_question_version(
+    *,
+    question_id: UUID,
+    user_id: UUID,
+    instruction: str,
+    content: Dict[str, Any],
+    seed_content: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Atomically assigns the next version number and inserts the row.
+    When seed_content is given and the question has no history yet, it is
+    stored as version 1 in the same transaction.
+    """
+    sb = get_supabase_client()
+    res = execute(
+        sb.rpc(
+            "commit_question_version",
+            {
+                "p_question_id": str(question_id),
+                "p_user_id": str(user_id),
+                "p_instruction": instruction,
+                "p_content": content,
+                "p_seed_content": seed_content,
+            },
+        )
+    )
+    rows = cast(list[dict[str, Any]], res.data or [])
+    invalidate_question_reads(question_ids=[question_id])
+    if not rows:
+        raise RuntimeError(f"Failed to commit version for question {question_id}")
     return rows[0]
 
 
-def get_recent_questions(user_id: str) -> List[Dict[str, Any]]:
+def get_session_questions_for_refinement(
+    *,
+    session_id: UUID,
+    user_id: UUID,
+    question_ids: Optional[List[UUID]] = None,
+) -> List[tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Returns [(question, latest_version)] for the user's questions in a session.
+    Calls the SQL RPC defined in 003_session_refinement_rpc.sql.
+    """
     sb = get_supabase_client()
-    res = (
-        sb.table("questions")
-        .select("*")
-        .eq("user_id", user_id)
-        .order("created_at", desc=True)
-        .limit(200)
-        .execute()
+    res = execute(
+        sb.rpc(
+            "get_session_questions_for_refinement",
+            {
+                "p_session_id": str(session_id),
+                "p_user_id": str(user_id),
+                "p_question_ids": (
+                    [str(qid) for qid in question_ids] if question_ids else None
+                ),
+            },
+        ),
+        idempotent=True,
     )
     rows = cast(List[Dict[str, Any]], res.data or [])
+    return [(r["question"], r.get("latest_version")) for r in rows]
 
-    groups: dict[str, list[Dict[str, Any]]] = defaultdict(list)
-    for q in rows:
-        groups[q["session_id"]].append(q)
 
-    sessions = [
+def commit_question_versions(
+    *,
+    user_id: UUID,
+    instruction: str,
+    items: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Bulk variant of commit_question_version.
+    items: [{"question_id", "content", "seed_content"}]
+    Returns the newly inserted (non-seed) version rows.
+    """
+    if not items:
+        return []
+    sb = get_supabase_client()
+    payload = [
         {
-            "session_id": sid,
-            "question_type": qs[0]["question_type"],
-            "quantity": len(qs),
-            "created_at": qs[0]["created_at"],
-            "source_type": qs[0]["source_type"],
-            "questions": qs,
+            "question_id": str(item["question_id"]),
+            "content": item["content"],
+            "seed_content": item.get("seed_content"),
         }
-        for sid, qs in groups.items()
+        for item in items
     ]
-    sessions.sort(key=lambda s: s["created_at"], reverse=True)
-    return sessions
+    res = execute(
+        sb.rpc(
+            "commit_question_versions",
+            {
+                "p_user_id": str(user_id),
+                "p_instruction": instruction,
+                "p_items": payload,
+            },
+        )
+    )
+    invalidate_question_reads(question_ids=[item["question_id"] for item in items])
+    return cast(List[Dict[str, Any]], res.data or [])
 
 
-def get_questions_by_session(session_id: str) -> List[Dict[str, Any]]:
+def get_recent_questions(
+    user_id: str,
+    limit: int = 20,
+    before: Optional[tuple[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Returns session summaries (no question bodies), newest first.
+    `before` is the (created_at, session_id) keyset of the last row seen.
+    Calls the SQL RPC get_session_summaries defined in 004_session_summaries.sql.
+    """
     sb = get_supabase_client()
-    res = (
+    payload: Dict[str, Any] = {"p_user_id": user_id, "p_limit": limit}
+    if before:
+        payload["p_before_created_at"], payload["p_before_id"] = before
+    res = execute(sb.rpc("get_session_summaries", payload), idempotent=True)
+    return cast(List[Dict[str, Any]], res.data or [])
+
+
+def get_questions_by_session(
+    session_id: str, columns: str = QUESTION_COLUMNS
+) -> List[Dict[str, Any]]:
+    sb = get_supabase_client()
+    res = execute(
         sb.table("questions")
-        .select("*")
+        .select(columns)
         .eq("session_id", session_id)
         .order("created_at", desc=True)
-        .execute()
     )
     rows = cast(List[Dict[str, Any]], res.data or [])
     return rows
 
 
+def get_question_texts(
+    *,
+    user_id: UUID,
+    session_id: UUID,
+    document_id: Optional[UUID] = None,
+) -> List[str]:
+    """Question texts already stored for a document, or for a session."""
+    sb = get_supabase_client()
+    query = sb.table("questions").select("question_text").eq("user_id", str(user_id))
+    if document_id:
+        query = query.eq("document_id", str(document_id))
+    else:
+        query = query.eq("session_id", str(session_id))
+    res = execute(query)
+    rows = cast(List[Dict[str, Any]], res.data or [])
+    return [r["question_text"] for r in rows if r.get("question_text")]
+
+
+# Binary candidates need a deep pool to be worth re-ranking; see
+# QUESTION_SEARCH_RERANK_FACTOR. The pool also sets hnsw.ef_search, which
+# pgvector caps at 1000.
+MIN_RERANK_FACTOR = 16
+MAX_RERANK_CANDIDATES = 1000
+
+
+def _rerank_candidates(limit: int) -> int:
+    factor = settings.QUESTION_SEARCH_RERANK_FACTOR
+    if factor <= 0:
+        return 0  # halfvec HNSW path
+    return min(limit * max(factor, MIN_RERANK_FACTOR), MAX_RERANK_CANDIDATES)
+
+
+def search_questions(
+    *,
+    user_id: UUID,
+    query_embedding: Vector,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Top-k of the user's questions by cosine similarity, best first.
+    Calls the SQL RPC search_questions defined in 010_embedding_dim.sql.
+    """
+    sb = get_supabase_client()
+    res = execute(
+        sb.rpc(
+            "search_questions",
+            {
+                "p_user_id": str(user_id),
+                "p_query_embedding": vector_literal(query_embedding),
+                "p_match_count": limit,
+                "p_rerank_candidates": _rerank_candidates(limit),
+            },
+        ),
+        idempotent=True,
+    )
+    return cast(List[Dict[str, Any]], res.data or [])
+
+
+def get_export_page(
+    *,
+    user_id: UUID,
+    session_id: Optional[UUID] = None,
+    after: Optional[tuple[str, str]] = None,
+    limit: int = 500,
+) -> List[Dict[str, Any]]:
+    """
+    One page of questions with their latest refined content, oldest first.
+    `after` is the (created_at, id) keyset of the last row seen.
+    Calls the SQL RPC export_questions defined in 007_question_export.sql.
+    """
+    sb = get_supabase_client()
+    payload: Dict[str, Any] = {"p_user_id": str(user_id), "p_limit": limit}
+    if session_id:
+        payload["p_session_id"] = str(session_id)
+    if after:
+        payload["p_after_created_at"], payload["p_after_id"] = after
+    res = execute(sb.rpc("export_questions", payload), idempotent=True)
+    return cast(List[Dict[str, Any]], res.data or [])
+
+
 def get_question_versions(question_id: UUID) -> List[Dict[str, Any]]:
     sb = get_supabase_client()
-    res = (
+    res = execute(
         sb.table("question_versions")
         .select("*")
         .eq("question_id", str(question_id))
         .order("version", desc=True)
-        .execute()
     )
     rows = cast(List[Dict[str, Any]], res.data or [])
     return rows
+
+
+def read_question(question_id: UUID) -> CachedRead:
+    return _read_through(
+        ("question", str(question_id)), lambda: get_question_by_id(question_id)
+    )
+
+
+def read_questions_by_session(session_id: str) -> CachedRead:
+    return _read_through(
+        ("session", str(session_id)), lambda: get_questions_by_session(session_id)
+    )
+
+
+def read_question_versions(question_id: UUID) -> CachedRead:
+    return _read_through(
+        ("versions", str(question_id)), lambda: get_question_versions(question_id)
+    )
@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Any, Dict, Optional, cast
 from uuid import UUID
 
-from app.db.client import get_supabase_client
+from app.db.client import execute, get_supabase_client
 from app.models.question_seed import QuestionSeed  # <-- adjust import to your project
 
 
@@ -36,7 +36,7 @@ def insert_question_seed(
         "analysis": analysis,
     }
 
-    res = sb.table("question_seeds").insert(payload).execute()
+    res = execute(sb.table("question_seeds").insert(payload))
     if not res.data:
         raise RuntimeError("Failed to insert question_seed (no rows returned).")
     return QuestionSeed.model_validate(res.data[0])
@@ -48,9 +48,9 @@ def update_question_seed(seed_id: UUID, patch: Dict[str, Any]) -> None:
       {"seed_image_path": "...", "analysis": {...}}
     """
     sb = get_supabase_client()
-    sb.table("question_seeds").update(patch).eq("id", str(seed_id)).execute()
+    execute(sb.table("question_seeds").update(patch).eq("id", str(seed_id)))
 
 
 def delete_question_seed(*, seed_id: UUID) -> None:
     sb = get_supabase_client()
-    sb.table("question_seeds").delete().eq("id", str(seed_id)).execute()
+    execute(sb.table("question_seeds").delete().eq("id", str(seed_id)))
@@ -1,13 +1,16 @@
-from uuid import UUID
-from typing import Dict, Literal, Optional
+from __future__ import annotations
 
-from supabase import Client
+from uuid import UUID
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional
 
-from app.db.client import get_supabase_client
+from app.db.client import execute, get_supabase_client
 from app.models.session import Session
 from app.schemas.document import QuestionType
 from app.schemas.similar import Difficulty
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 
 def create_session(
     user_id: UUID,
@@ -27,7 +30,38 @@ def create_session(
         "quantity": quantity,
         "difficulty": difficulty,
     }
-    res = sb.table("sessions").insert(payload).execute()
+    res = execute(sb.table("sessions").insert(payload))
     if not res.data:
         raise RuntimeError(f"Failed to create session: {res}")
     return Session.model_validate(res.data[0])
+
+
+def create_sessions(
+    user_id: UUID,
+    count: int,
+    question_type: QuestionType,
+    quantity: int,
+    source_type: Optional[Literal["document", "similarity"]] = None,
+    difficulty: Optional[Difficulty] = None,
+    supabase: Client | None = None,
+) -> List[Session]:
+    """
+    `count` sessions in one insert (one per batch-ingested file), all with
+    the generation settings the batch was uploaded with.
+    """
+    sb = supabase or get_supabase_client()
+    payload = [
+        {
+            "user_id": str(user_id),
+            "title": "",
+            "source_type": source_type,
+            "question_type": question_type,
+            "quantity": quantity,
+            "difficulty": difficulty,
+        }
+        for _ in range(count)
+    ]
+    res = execute(sb.table("sessions").insert(payload))
+    if not res.data or len(res.data) != count:
+        raise RuntimeError(f"Failed to create sessions: {res}")
+    return [Session.model_validate(row) for row in res.data]
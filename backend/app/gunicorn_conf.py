@@ -0,0 +1,4 @@
+# Config for the gunicorn CLI: gunicorn -c app/gunicorn_conf.py app.main:app
+from app.server import gunicorn_options
+
+globals().update(gunicorn_options())
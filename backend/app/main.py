@@ -1,8 +1,16 @@
-from fastapi import APIRouter, FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.core.logger import setup_logging
+from app.core.resilience import DependencyUnavailable
+from app.core.warmup import check_embedding_dim, warm_up
+from app.ai.scheduler import llm_scheduler
+from app.api.responses import QuestJSONResponse
+from app.middleware.compression import add_compression
 from app.middleware.logging import RequestLoggingMiddleware
 
 # Initialize logging on startup
@@ -13,10 +21,22 @@ from app.api.routes.question import router as question_router
 from app.api.routes.refinement import router as refinement_router
 from app.api.routes.similar import router as similar_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(check_embedding_dim)
+    # Startup completes (and the worker reports ready) only after warm-up.
+    if settings.WARMUP_ON_STARTUP:
+        await run_in_threadpool(warm_up)
+    yield
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="QuestAI Platform API",
     description="Backend API for QuestAI Platform",
     version="1.0.0",
+    default_response_class=QuestJSONResponse,
 )
 
 allowed_origins = [
@@ -31,11 +51,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+add_compression(app)
 app.add_middleware(RequestLoggingMiddleware)
 
 
+@app.exception_handler(DependencyUnavailable)
+async def dependency_unavailable_handler(request: Request, exc: DependencyUnavailable):
+    return QuestJSONResponse(
+        status_code=503,
+        content={"detail": f"{exc.dependency} is temporarily unavailable."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
@@ -80,3 +111,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/health/llm")
+async def llm_health():
+    return llm_scheduler.metrics()
@@ -0,0 +1,27 @@
+from fastapi import FastAPI
+from starlette.middleware.gzip import GZipMiddleware
+
+from app.core.config import settings
+
+
+def add_compression(app: FastAPI) -> None:
+    """
+    Compresses responses above RESPONSE_COMPRESSION_MIN_SIZE. Uses brotli when
+    brotli-asgi is installed (it falls back to gzip for clients without br),
+    otherwise Starlette's gzip. Streaming responses that must flush per line
+    opt out by setting `Content-Encoding: identity`.
+    """
+    try:
+        from brotli_asgi import BrotliMiddleware
+
+        app.add_middleware(
+            BrotliMiddleware,
+            minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+            gzip_fallback=True,
+        )
+    except ImportError:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+            compresslevel=6,
+        )
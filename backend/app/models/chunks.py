@@ -11,6 +11,8 @@ class DocChunk(BaseModel):
     session_id: UUID
     document_id: UUID
     chunk_index: int
-    content: str
+    content: Optional[str] = None
+    start_offset: Optional[int] = None
+    end_offset: Optional[int] = None
     embedding: Optional[List[float]] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
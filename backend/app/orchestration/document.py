@@ -1,9 +1,12 @@
 from uuid import UUID
 from app.ai.agents.document import DocumentAgent
-from app.db.repositories.question import insert_questions
+from app.ai.dedup import embed_questions, generate_unique
+from app.db.repositories.chunks import mark_chunks_used
+from app.db.repositories.question import get_question_texts, insert_questions
 from app.schemas.document import (
     DocumentGenerateRequest,
     DocumentGenerateResponse,
+    DocumentServiceResult,
     GeneratedQuestion,
 )
 from app.services.document import DocumentService
@@ -25,10 +28,37 @@ class DocumentOrchestration:
             user_id=user_id, filename=filename, pdf_bytes=pdf_bytes, req=req
         )
 
-        generated_questions = self.agent.run(
-            context_chunks=ctx.retrieved_context_chunks,
+        return self._generate(user_id=user_id, ctx=ctx, req=req)
+
+    def run_more(
+        self,
+        user_id: UUID,
+        document_id: UUID,
+        req: DocumentGenerateRequest,
+    ):
+        ctx = self.document_service.build_context_from_document(
+            user_id=user_id, document_id=document_id, req=req
+        )
+        return self._generate(user_id=user_id, ctx=ctx, req=req)
+
+    def _generate(
+        self,
+        user_id: UUID,
+        ctx: DocumentServiceResult,
+        req: DocumentGenerateRequest,
+    ):
+        existing = get_question_texts(
+            user_id=user_id, session_id=ctx.session_id, document_id=ctx.document_id
+        )
+        generated_questions = generate_unique(
+            lambda count, avoid: self.agent.run(
+                context_chunks=ctx.retrieved_context_chunks,
+                count=count,
+                question_type=req.question_type,
+                avoid=avoid,
+            ),
             count=req.quantity,
-            question_type=req.question_type,
+            existing=existing,
         )
 
         rows = insert_questions(
@@ -36,10 +66,15 @@ class DocumentOrchestration:
             session_id=ctx.session_id,
             document_id=ctx.document_id,
             questions=generated_questions,
+            embeddings=embed_questions(
+                [q["question_text"] for q in generated_questions]
+            ),
         )
+        mark_chunks_used(user_id=user_id, chunk_ids=ctx.retrieved_chunk_ids)
 
-        return DocumentGenerateResponse(
+        # Rows come straight back from our own insert: skip re-validation.
+        return DocumentGenerateResponse.model_construct(
             session_id=ctx.session_id,
             document_id=ctx.document_id,
-            questions=[GeneratedQuestion(**r) for r in rows],
+            questions=[GeneratedQuestion.model_construct(**r) for r in rows],
         )
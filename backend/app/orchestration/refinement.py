@@ -1,13 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException
 from app.ai.agents.refinement import RefinementAgent
+from app.core.config import settings
+from app.core.logger import logger
 from app.db.repositories.question import (
-    get_latest_question_version,
-    get_question_by_id,
-    insert_question_version,
+    commit_question_version,
+    commit_question_versions,
+    get_question_for_refinement,
+    get_session_questions_for_refinement,
 )
-from app.schemas.refinement import QuestionContent, RefinementResponse
+from app.schemas.refinement import (
+    QuestionContent,
+    RefinementResponse,
+    SessionRefinementItem,
+)
+
+
+def _base_content(base: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "question_type": base["question_type"],
+        "question_text": base["question_text"],
+        "options": base.get("options"),
+        "correct_answer": base["correct_answer"],
+        "explanation": base["explanation"],
+        "tags": base.get("tags"),
+        "confidence_score": base.get("confidence_score"),
+    }
 
 
 class RefinementOrchestration:
@@ -15,51 +36,124 @@ class RefinementOrchestration:
         self.agent = RefinementAgent()
 
     def run(self, user_id: UUID, question_id: UUID, instruction: str):
-        base = get_question_by_id(question_id)
+        base, latest = get_question_for_refinement(question_id)
         if not base:
             raise HTTPException(status_code=404, detail="Question not found")
         if str(base["user_id"]) != str(user_id):
             raise HTTPException(status_code=403, detail="Forbidden")
 
-        base_content = {
-            "question_type": base["question_type"],
-            "question_text": base["question_text"],
-            "options": base.get("options"),
-            "correct_answer": base["correct_answer"],
-            "explanation": base["explanation"],
-            "tags": base.get("tags"),
-            "confidence_score": base.get("confidence_score"),
-        }
-
-        latest = get_latest_question_version(question_id)
+        base_content = _base_content(base)
 
         if latest is None:
-            insert_question_version(
-                question_id=question_id,
-                user_id=user_id,
-                version=1,
-                instruction="__seed__",
-                content=base_content,
-            )
             current = base_content
-            next_version = 2
         else:
             current = latest["content"]
-            next_version = int(latest["version"]) + 1
 
         edited = self.agent.run(
             instruction=instruction,
             current_question=current,
         )
 
-        insert_question_version(
+        row = commit_question_version(
             question_id=question_id,
             user_id=user_id,
-            version=next_version,
             instruction=instruction,
             content=edited,
+            seed_content=base_content if latest is None else None,
         )
         content = QuestionContent.model_validate(edited)
         return RefinementResponse(
-            question_id=question_id, version=next_version, question=content
+            question_id=question_id, version=int(row["version"]), question=content
         )
+
+    def run_session(
+        self,
+        user_id: UUID,
+        session_id: UUID,
+        instruction: str,
+        question_ids: Optional[List[UUID]] = None,
+    ) -> Iterator[str]:
+        """
+        Loads the session eagerly (so 404s surface before streaming starts)
+        and returns a generator of NDJSON lines, one per question, in the
+        order the agent calls finish.
+        """
+        targets = get_session_questions_for_refinement(
+            session_id=session_id, user_id=user_id, question_ids=question_ids
+        )
+        if not targets:
+            raise HTTPException(status_code=404, detail="No questions found")
+
+        return self._stream_session(user_id, instruction, targets)
+
+    def _stream_session(
+        self,
+        user_id: UUID,
+        instruction: str,
+        targets: List[tuple[Dict[str, Any], Optional[Dict[str, Any]]]],
+    ) -> Iterator[str]:
+        pending: List[Dict[str, Any]] = []
+
+        def refine(base: Dict[str, Any], latest: Optional[Dict[str, Any]]):
+            base_content = _base_content(base)
+            current = latest["content"] if latest else base_content
+            edited = self.agent.run(instruction=instruction, current_question=current)
+            return {
+                "question_id": base["id"],
+                "content": edited,
+                "seed_content": base_content if latest is None else None,
+            }
+
+        def flush() -> Iterator[str]:
+            items = list(pending)
+            pending.clear()
+            try:
+                rows = commit_question_versions(
+                    user_id=user_id, instruction=instruction, items=items
+                )
+            except Exception as e:
+                logger.error(f"Session refinement commit failed: {e}")
+                for item in items:
+                    yield _line(
+                        question_id=item["question_id"],
+                        status="error",
+                        detail="Failed to save refined question",
+                    )
+                return
+
+            versions = {str(r["question_id"]): int(r["version"]) for r in rows}
+            for item in items:
+                yield _line(
+                    question_id=item["question_id"],
+                    status="ok",
+                    version=versions.get(str(item["question_id"])),
+                    question=QuestionContent.model_validate(item["content"]),
+                )
+
+        executor = ThreadPoolExecutor(max_workers=settings.REFINEMENT_BATCH_CONCURRENCY)
+        try:
+            futures = {
+                executor.submit(refine, base, latest): base["id"]
+                for base, latest in targets
+            }
+            for future in as_completed(futures):
+                try:
+                    pending.append(future.result())
+                except Exception as e:
+                    logger.error(f"Refinement failed for question {futures[future]}: {e}")
+                    yield _line(
+                        question_id=futures[future],
+                        status="error",
+                        detail="Failed to refine question",
+                    )
+                    continue
+                if len(pending) >= settings.REFINEMENT_BATCH_FLUSH_SIZE:
+                    yield from flush()
+            if pending:
+                yield from flush()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _line(**fields: Any) -> str:
+    return SessionRefinementItem(**fields).model_dump_json() + "\n"
@@ -2,6 +2,7 @@ from uuid import UUID
 
 from fastapi import UploadFile
 from app.ai.agents.similar import SimilarAgent
+from app.ai.dedup import embed_questions, generate_unique
 from app.db.repositories.question import insert_questions
 from app.schemas.document import GeneratedQuestion
 from app.schemas.similar import SimilarGenerateRequest, SimilarGenerateResponse
@@ -25,11 +26,18 @@ class SimilarOrchestration:
             user_id=user_id, image=image, req=req, img_bytes=img_bytes
         )
 
-        generated_questions = self.agent.run(
-            instruction=req.instruction,
-            difficulty=req.difficulty,
-            quantity=req.quantity,
-            data_url=ctx.data_url,
+        # A similarity session is new on every request, so only the batch
+        # itself can hold duplicates.
+        generated_questions = generate_unique(
+            lambda count, avoid: self.agent.run(
+                instruction=req.instruction,
+                difficulty=req.difficulty,
+                quantity=count,
+                data_url=ctx.data_url,
+                avoid=avoid,
+            ),
+            count=req.quantity,
+            existing=[],
         )
 
         rows = insert_questions(
@@ -37,9 +45,13 @@ class SimilarOrchestration:
             session_id=ctx.session_id,
             source_type="similarity",
             questions=generated_questions,
+            embeddings=embed_questions(
+                [q["question_text"] for q in generated_questions]
+            ),
         )
 
-        return SimilarGenerateResponse(
+        # Rows come straight back from our own insert: skip re-validation.
+        return SimilarGenerateResponse.model_construct(
             session_id=ctx.session_id,
-            questions=[GeneratedQuestion(**r) for r in rows],
+            questions=[GeneratedQuestion.model_construct(**r) for r in rows],
         )
@@ -29,6 +29,7 @@ class DocumentServiceResult(BaseModel):
     storage_path: str
     extracted_text_preview: str
     retrieved_context_chunks: List[str] = Field(default_factory=list)
+    retrieved_chunk_ids: List[UUID] = Field(default_factory=list)
 
 
 class GeneratedQuestion(BaseModel):
@@ -126,3 +127,16 @@ QUESTION_GENERATION_SCHEMA = {
         }
     },
 }
+
+
+class DocumentStatusResponse(BaseModel):
+    id: UUID
+    session_id: UUID
+    filename: str
+    status: Literal["uploaded", "processing", "ready", "failed"]
+    error_message: Optional[str] = None
+    created_at: datetime
+
+
+class DocumentBatchResponse(BaseModel):
+    documents: List[DocumentStatusResponse]
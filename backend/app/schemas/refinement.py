@@ -1,7 +1,6 @@
-from typing import Any, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 from pydantic import BaseModel, Field
-from supabase_auth import Dict
 
 from app.schemas.document import (
     MCQ_OPTIONS_SCHEMA,
@@ -13,6 +12,11 @@ class RefinementRequest(BaseModel):
     instruction: str = Field(..., min_length=2, max_length=500)
 
 
+class SessionRefinementRequest(BaseModel):
+    instruction: str = Field(..., min_length=2, max_length=500)
+    question_ids: Optional[List[UUID]] = Field(default=None, max_length=200)
+
+
 class QuestionContent(BaseModel):
     question_type: QuestionType
     question_text: str
@@ -29,6 +33,16 @@ class RefinementResponse(BaseModel):
     question: QuestionContent
 
 
+class SessionRefinementItem(BaseModel):
+    """One NDJSON line of a streamed session refinement."""
+
+    question_id: UUID
+    status: Literal["ok", "error"]
+    version: Optional[int] = None
+    question: Optional[QuestionContent] = None
+    detail: Optional[str] = None
+
+
 QUESTION_REFINEMENT_SCHEMA = {
     "type": "object",
     "additionalProperties": False,
@@ -77,3 +91,42 @@ QUESTION_REFINEMENT_SCHEMA = {
         }
     },
 }
+
+
+MCQ_OPTIONS_PATCH_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "minProperties": 1,
+    "properties": {
+        "A": {"type": "string", "minLength": 1},
+        "B": {"type": "string", "minLength": 1},
+        "C": {"type": "string", "minLength": 1},
+        "D": {"type": "string", "minLength": 1},
+    },
+}
+
+QUESTION_REFINEMENT_PATCH_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["patch"],
+    "properties": {
+        "patch": {
+            "type": "object",
+            "additionalProperties": False,
+            "minProperties": 1,
+            "properties": {
+                "question_type": {"type": "string", "enum": ["mcq", "open"]},
+                "question_text": {"type": "string", "minLength": 5},
+                "options": {"oneOf": [MCQ_OPTIONS_PATCH_SCHEMA, {"type": "null"}]},
+                "correct_answer": {"type": "string", "minLength": 1},
+                "explanation": {"type": "string", "minLength": 20},
+                "tags": {"type": ["object", "null"]},
+                "confidence_score": {
+                    "type": ["number", "null"],
+                    "minimum": 0,
+                    "maximum": 1,
+                },
+            },
+        }
+    },
+}
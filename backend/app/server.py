@@ -0,0 +1,90 @@
+"""
+Production entrypoint: gunicorn managing uvicorn workers on uvloop/httptools.
+
+Run from backend/:
+    python -m app.server
+or, with the gunicorn CLI:
+    gunicorn -c app/gunicorn_conf.py app.main:app
+"""
+
+import os
+from typing import Any, Dict
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+
+class QuestUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+
+def worker_count() -> int:
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (
+        os.cpu_count() or 1
+    )
+    return max(
+        1, min(settings.SERVER_WORKERS_PER_CORE * cpus + 1, settings.SERVER_MAX_WORKERS)
+    )
+
+
+def request_timeouts() -> tuple[float, float]:
+    """
+    Returns (timeout, graceful_timeout). Generation routes run the LLM calls
+    in the threadpool, so the event loop keeps heartbeating while they wait;
+    a worker that misses the longest single-call budget is genuinely hung.
+    Graceful shutdown waits the same budget for in-flight calls.
+    """
+    longest = max(
+        [*settings.LLM_LATENCY_BUDGETS.values(), settings.LLM_DEFAULT_LATENCY_BUDGET]
+    )
+    budget = longest + settings.SERVER_TIMEOUT_MARGIN_SECONDS
+    return budget, budget
+
+
+def gunicorn_options() -> Dict[str, Any]:
+    timeout, graceful_timeout = request_timeouts()
+    return {
+        "bind": f"{settings.SERVER_HOST}:{settings.PORT}",
+        "workers": worker_count(),
+        "worker_class": "app.server.QuestUvicornWorker",
+        "timeout": int(timeout),
+        "graceful_timeout": int(graceful_timeout),
+        "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        # Import the app once in the master so workers share its code pages
+        # copy-on-write. Clients, pools and caches are created after fork.
+        "preload_app": settings.SERVER_PRELOAD_APP,
+        "forwarded_allow_ips": "*",
+        "accesslog": None,
+        "errorlog": "-",
+        "loglevel": settings.LOG_LEVEL.lower(),
+    }
+
+
+class QuestServer(BaseApplication):
+    def __init__(self, options: Dict[str, Any]):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+
+        return app
+
+
+def main() -> None:
+    QuestServer(gunicorn_options()).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
-from typing import List
+import math
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
+from fastapi import HTTPException
+
 from app.ai.embeddings import embed_query, embed_texts
+from app.ai.tokens import estimate_tokens, generation_context_tokens
 from app.db.repositories.chunks import (
     insert_chunks,
     match_doc_chunks,
-    update_embeddings,
 )
 from app.db.repositories.document import (
     create_document,
+    get_document,
     update_document_status,
     update_extracted_text,
 )
@@ -16,10 +20,52 @@ from app.db.repositories.session import create_session
 from app.core.config import settings
 from app.models import document
 from app.schemas.document import DocumentGenerateRequest, DocumentServiceResult
-from app.utils.pdf import chunk_text, extract_text_from_pdf_bytes
+from app.utils.pdf import chunk_spans
+from app.utils.pdf_sandbox import extract_pdf_text
 from app.utils.storage import upload_pdf_bytes
 
 
+RETRIEVAL_QUERY = "key concepts, important definitions, main ideas, formulas, examples"
+
+
+def retrieval_depth(
+    quantity: int, total_chunks: Optional[int], context_tokens: int
+) -> int:
+    """
+    How many chunks to retrieve for `quantity` questions. Chunks are sized as
+    prose since their text is not fetched yet; fit_chunks trims any overshoot
+    against the real token counts.
+    """
+    by_quantity = math.ceil(quantity / settings.RETRIEVAL_QUESTIONS_PER_CHUNK)
+    chunk_tokens = max(1, estimate_tokens(settings.PDF_CHUNK_SIZE))
+    by_budget = max(1, context_tokens // chunk_tokens)
+    depth = max(settings.RETRIEVAL_MIN_CHUNKS, by_quantity)
+    depth = min(depth, by_budget, settings.RETRIEVAL_MAX_CHUNKS)
+    if total_chunks is not None:
+        depth = min(depth, total_chunks)
+    return max(1, depth)
+
+
+def select_relevant(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Keeps matches (ordered by similarity) until they fall below the relative
+    cut-off, but never fewer than RETRIEVAL_MIN_CHUNKS.
+    """
+    if not matches:
+        return []
+    best = float(matches[0].get("similarity") or 0.0)
+    kept: List[Dict[str, Any]] = []
+    for m in matches:
+        score = float(m.get("similarity") or 0.0)
+        if (
+            len(kept) >= settings.RETRIEVAL_MIN_CHUNKS
+            and score < best * settings.RETRIEVAL_RELATIVE_CUTOFF
+        ):
+            break
+        kept.append(m)
+    return kept
+
+
 class DocumentService:
     def build_context_from_pdf(
         self,
@@ -54,16 +100,17 @@ class DocumentService:
             content=pdf_bytes,
         )
 
-        extracted_text = extract_text_from_pdf_bytes(pdf_bytes)
+        extracted_text = extract_pdf_text(pdf_bytes)
         update_extracted_text(
             user_id=user_id, document_id=document_id, extracted_text=extracted_text
         )
 
-        chunks = chunk_text(
+        spans = chunk_spans(
             extracted_text,
             chunk_size=settings.PDF_CHUNK_SIZE,
             overlap=settings.PDF_CHUNK_OVERLAP,
         )
+        chunks = [extracted_text[start:end] for start, end in spans]
 
         if not chunks:
             raise ValueError(
@@ -75,26 +122,16 @@ class DocumentService:
             session_id=session_id,
             document_id=document_id,
             chunks=chunks,
+            spans=spans,
+            embeddings=embed_texts(chunks, batch_size=settings.EMBEDDING_BATCH_SIZE),
         )
 
-        embeddings = embed_texts([c.content for c in chunk_rows])
-        id_to_emb = [(row.id, emb) for row, emb in zip(chunk_rows, embeddings)]
-        update_embeddings(user_id=user_id, chunk_id_to_embedding=id_to_emb)
-
-        ## TODO  retrieval query
-        ## TODO match_count
-        retrieval_query = (
-            "key concepts, important definitions, main ideas, formulas, examples"
-        )
-
-        q_emb = embed_query(retrieval_query)
-        matches = match_doc_chunks(
+        retrieved = self.retrieve(
             user_id=user_id,
             document_id=document_id,
-            query_embedding=q_emb,
-            match_count=6,
+            quantity=req.quantity,
+            total_chunks=len(chunk_rows),
         )
-        retrieved: List[str] = [m["content"] for m in matches] if matches else []
         update_document_status(
             user_id=user_id, document_id=document_id, status="ready", error_message=None
         )
@@ -103,5 +140,79 @@ class DocumentService:
             document_id=document_id,
             storage_path=storage_path,
             extracted_text_preview=extracted_text[:600],
-            retrieved_context_chunks=retrieved,
+            retrieved_context_chunks=[m["content"] for m in retrieved],
+            retrieved_chunk_ids=[m["id"] for m in retrieved],
+        )
+
+    def build_context_from_document(
+        self,
+        user_id: UUID,
+        document_id: UUID,
+        req: DocumentGenerateRequest,
+    ) -> DocumentServiceResult:
+        """
+        Context for a follow-up batch on an already ingested document: no
+        upload, extraction, chunking or embedding, and chunks earlier batches
+        drew on are skipped while fresh ones remain.
+        """
+        doc = get_document(user_id=user_id, document_id=document_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        if doc.status != "ready":
+            raise HTTPException(
+                status_code=409, detail=f"Document is not ready ({doc.status})"
+            )
+
+        retrieved = self.retrieve(
+            user_id=user_id,
+            document_id=document_id,
+            quantity=req.quantity,
+            unused_first=True,
         )
+        if not retrieved:
+            raise HTTPException(
+                status_code=409, detail="Document has no embedded chunks"
+            )
+
+        return DocumentServiceResult(
+            session_id=doc.session_id,
+            document_id=document_id,
+            storage_path=doc.storage_path,
+            extracted_text_preview="",
+            retrieved_context_chunks=[m["content"] for m in retrieved],
+            retrieved_chunk_ids=[m["id"] for m in retrieved],
+        )
+
+    def retrieve(
+        self,
+        user_id: UUID,
+        document_id: UUID,
+        quantity: int,
+        total_chunks: Optional[int] = None,
+        unused_first: bool = False,
+    ) -> List[Dict[str, Any]]:
+        depth = retrieval_depth(
+            quantity=quantity,
+            total_chunks=total_chunks,
+            context_tokens=generation_context_tokens("document", quantity),
+        )
+        q_emb = embed_query(RETRIEVAL_QUERY)
+
+        matches: List[Dict[str, Any]] = []
+        if unused_first:
+            matches = match_doc_chunks(
+                user_id=user_id,
+                document_id=document_id,
+                query_embedding=q_emb,
+                match_count=depth,
+                unused_only=True,
+            )
+        if len(matches) < settings.RETRIEVAL_MIN_CHUNKS:
+            # Fresh material ran out: fall back to the whole document.
+            matches = match_doc_chunks(
+                user_id=user_id,
+                document_id=document_id,
+                query_embedding=q_emb,
+                match_count=depth,
+            )
+        return select_relevant(matches)
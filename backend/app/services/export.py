@@ -0,0 +1,140 @@
+import csv
+import io
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Optional
+from uuid import UUID
+from xml.sax.saxutils import escape
+
+import orjson
+
+from app.core.config import settings
+from app.db.repositories.question import get_export_page
+
+ExportFormat = Literal["ndjson", "csv", "moodle"]
+
+OPTION_KEYS = ("A", "B", "C", "D")
+
+CSV_COLUMNS = [
+    "id",
+    "session_id",
+    "document_id",
+    "source_type",
+    "question_type",
+    "question_text",
+    *(f"option_{k.lower()}" for k in OPTION_KEYS),
+    "correct_answer",
+    "explanation",
+    "version",
+    "created_at",
+]
+
+
+def iter_export_rows(
+    user_id: UUID, session_id: Optional[UUID] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yields the user's questions page by page; one page is held at a time."""
+    after = None
+    while True:
+        page = get_export_page(
+            user_id=user_id,
+            session_id=session_id,
+            after=after,
+            limit=settings.EXPORT_PAGE_SIZE,
+        )
+        yield from page
+        if len(page) < settings.EXPORT_PAGE_SIZE:
+            return
+        after = (page[-1]["created_at"], page[-1]["id"])
+
+
+def _pages(rows: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    page: List[Dict[str, Any]] = []
+    for row in rows:
+        page.append(row)
+        if len(page) >= settings.EXPORT_PAGE_SIZE:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def to_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    for page in _pages(rows):
+        yield b"".join(orjson.dumps(r) + b"\n" for r in page)
+
+
+def to_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    yield buf.getvalue()
+
+    for page in _pages(rows):
+        buf.seek(0)
+        buf.truncate()
+        for r in page:
+            options = r.get("options") or {}
+            writer.writerow(
+                [
+                    r["id"],
+                    r["session_id"],
+                    r.get("document_id") or "",
+                    r["source_type"],
+                    r["question_type"],
+                    r["question_text"],
+                    *(options.get(k, "") for k in OPTION_KEYS),
+                    r["correct_answer"],
+                    r["explanation"],
+                    r["version"],
+                    r["created_at"],
+                ]
+            )
+        yield buf.getvalue()
+
+
+def _moodle_text(tag: str, text: str, fmt: Optional[str] = None) -> str:
+    attr = f' format="{fmt}"' if fmt else ""
+    return f"<{tag}{attr}><text>{escape(text or '')}</text></{tag}>"
+
+
+def _moodle_question(r: Dict[str, Any]) -> str:
+    name = " ".join((r["question_text"] or "").split())[:80]
+    parts = [
+        _moodle_text("name", name),
+        _moodle_text("questiontext", r["question_text"], "html"),
+        _moodle_text("generalfeedback", r["explanation"], "html"),
+    ]
+
+    if r["question_type"] == "mcq":
+        options = r.get("options") or {}
+        parts.append("<single>true</single><shuffleanswers>true</shuffleanswers>")
+        for key in OPTION_KEYS:
+            if key not in options:
+                continue
+            fraction = 100 if key == r["correct_answer"] else 0
+            parts.append(
+                f'<answer fraction="{fraction}" format="html">'
+                f"<text>{escape(str(options[key]))}</text></answer>"
+            )
+        qtype = "multichoice"
+    else:
+        parts.append(
+            '<answer fraction="100" format="plain_text">'
+            f"<text>{escape(r['correct_answer'] or '')}</text></answer>"
+        )
+        qtype = "shortanswer"
+
+    return f'<question type="{qtype}">' + "".join(parts) + "</question>\n"
+
+
+def to_moodle_xml(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<quiz>\n'
+    for page in _pages(rows):
+        yield "".join(_moodle_question(r) for r in page)
+    yield "</quiz>\n"
+
+
+EXPORT_FORMATS: Dict[str, tuple[Callable[..., Iterator[Any]], str, str]] = {
+    "ndjson": (to_ndjson, "application/x-ndjson", "ndjson"),
+    "csv": (to_csv, "text/csv; charset=utf-8", "csv"),
+    "moodle": (to_moodle_xml, "application/xml", "xml"),
+}
@@ -0,0 +1,275 @@
+import io
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+
+from app.ai.embeddings import embed_texts
+from app.core.config import settings
+from app.core.logger import logger
+from app.db.repositories.chunks import insert_chunks
+from app.db.repositories.document import (
+    create_documents,
+    update_document_status,
+    update_extracted_text,
+)
+from app.db.repositories.session import create_sessions
+from app.models.document import Document
+from app.schemas.document import DocumentGenerateRequest
+from app.utils.pdf import chunk_spans
+from app.utils.pdf_sandbox import check_pdf_limits, extract_pdf_text
+from app.utils.storage import upload_pdf_bytes
+
+_io_pool_lock = threading.Lock()
+_io_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    with _io_pool_lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(
+                max_workers=settings.BATCH_INGEST_IO_WORKERS,
+                thread_name_prefix="ingest-io",
+            )
+        return _io_pool
+
+
+def _extract_and_chunk(pdf_bytes: bytes) -> Tuple[str, List[Tuple[int, int]]]:
+    text = extract_pdf_text(pdf_bytes)
+    return text, chunk_spans(
+        text,
+        chunk_size=settings.PDF_CHUNK_SIZE,
+        overlap=settings.PDF_CHUNK_OVERLAP,
+    )
+
+
+def _is_pdf_entry(info: zipfile.ZipInfo) -> bool:
+    return (
+        not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and info.filename.lower().endswith(".pdf")
+    )
+
+
+def count_upload_pdfs(files: List[BinaryIO]) -> int:
+    """
+    PDFs an upload will expand to, from zip central directories only, so
+    admission can be charged before anything is read into memory.
+    """
+    count = 0
+    for f in files:
+        if zipfile.is_zipfile(f):
+            f.seek(0)
+            with zipfile.ZipFile(f) as archive:
+                count += sum(1 for info in archive.infolist() if _is_pdf_entry(info))
+        else:
+            count += 1
+        f.seek(0)
+    return count
+
+
+def expand_uploads(files: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """
+    Flattens uploaded PDFs and zip archives into (filename, pdf_bytes) pairs,
+    enforcing the batch file-count and size limits (also on unpacked sizes).
+    """
+    out: List[Tuple[str, bytes]] = []
+    total = 0
+
+    def add(size: int) -> None:
+        nonlocal total
+        total += size
+        if total > settings.BATCH_INGEST_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Batch is too large.")
+        if len(out) >= settings.BATCH_INGEST_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.BATCH_INGEST_MAX_FILES} PDFs per batch.",
+            )
+
+    for filename, content in files:
+        if not zipfile.is_zipfile(io.BytesIO(content)):
+            add(len(content))
+            out.append((filename, content))
+            continue
+
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            for info in archive.infolist():
+                if not _is_pdf_entry(info):
+                    continue
+                add(info.file_size)
+                out.append((info.filename.rsplit("/", 1)[-1], archive.read(info)))
+
+    if not out:
+        raise HTTPException(status_code=400, detail="No PDF files in upload.")
+    return out
+
+
+@dataclass
+class _PendingDocument:
+    document: Document
+    pdf_bytes: bytes
+    chunks: List[str] = field(default_factory=list)
+    spans: List[Tuple[int, int]] = field(default_factory=list)
+    embeddings: List[Optional[List[float]]] = field(default_factory=list)
+    remaining: int = 0
+    failed: bool = False
+
+
+class BatchIngestionService:
+    def register(
+        self,
+        user_id: UUID,
+        files: List[Tuple[str, bytes]],
+        req: DocumentGenerateRequest,
+    ) -> List[Tuple[Document, bytes]]:
+        """
+        Creates a session (with the batch's generation settings) and an
+        'uploaded' document row per PDF, with one bulk insert for each table.
+        """
+        sessions = create_sessions(
+            user_id=user_id,
+            count=len(files),
+            source_type="document",
+            question_type=req.question_type,
+            quantity=req.quantity,
+        )
+        docs = create_documents(
+            user_id=user_id,
+            documents=[
+                {
+                    "session_id": session.id,
+                    "filename": filename,
+                    "storage_path": (
+                        f"{settings.SUPABASE_STORAGE_DOC_BUCKET}/"
+                        f"{user_id}/{session.id}/source.pdf"
+                    ),
+                }
+                for session, (filename, _) in zip(sessions, files)
+            ],
+        )
+        return [(doc, pdf_bytes) for doc, (_, pdf_bytes) in zip(docs, files)]
+
+    def process(self, user_id: UUID, docs: List[Tuple[Document, bytes]]) -> None:
+        """
+        Uploads, extracts, chunks and embeds every document. Extraction runs
+        in the sandboxed extraction pool; embedding requests are filled with chunks from
+        whichever files are ready, so small files share batches. Each
+        document's chunks go in with one bulk insert, then its status flips
+        to ready (or failed).
+        """
+        io_pool = _get_io_pool()
+        pending = [
+            _PendingDocument(document=doc, pdf_bytes=pdf_bytes)
+            for doc, pdf_bytes in docs
+        ]
+        io_futures: List[Future] = []
+        progress_lock = threading.Lock()
+
+        def fail(item: _PendingDocument, error: Exception) -> None:
+            with progress_lock:
+                if item.failed:
+                    return
+                item.failed = True
+            logger.error(f"Batch ingestion failed for {item.document.id}: {error}")
+            try:
+                update_document_status(
+                    user_id=user_id,
+                    document_id=item.document.id,
+                    status="failed",
+                    error_message=str(error)[:500],
+                )
+            except Exception as e:
+                logger.error(f"Could not mark {item.document.id} failed: {e}")
+
+        def finish(item: _PendingDocument) -> None:
+            try:
+                insert_chunks(
+                    user_id=user_id,
+                    session_id=item.document.session_id,
+                    document_id=item.document.id,
+                    chunks=item.chunks,
+                    spans=item.spans,
+                    embeddings=item.embeddings,
+                )
+                update_document_status(
+                    user_id=user_id, document_id=item.document.id, status="ready"
+                )
+            except Exception as e:
+                fail(item, e)
+
+        def upload(item: _PendingDocument) -> None:
+            try:
+                upload_pdf_bytes(
+                    bucket=settings.SUPABASE_STORAGE_DOC_BUCKET,
+                    path=f"{user_id}/{item.document.session_id}/source.pdf",
+                    content=item.pdf_bytes,
+                )
+            except Exception as e:
+                fail(item, e)
+
+        def embed(batch: List[Tuple[_PendingDocument, int]]) -> None:
+            try:
+                vectors = embed_texts([item.chunks[i] for item, i in batch])
+            except Exception as e:
+                for item, _ in batch:
+                    fail(item, e)
+                return
+            for (item, i), vec in zip(batch, vectors):
+                with progress_lock:
+                    item.embeddings[i] = vec
+                    item.remaining -= 1
+                    done = item.remaining == 0
+                if done and not item.failed:
+                    finish(item)
+
+        extractions: Dict[Future, _PendingDocument] = {}
+        for item in pending:
+            try:
+                check_pdf_limits(item.pdf_bytes)
+                update_document_status(
+                    user_id=user_id, document_id=item.document.id, status="processing"
+                )
+            except Exception as e:
+                fail(item, e)
+                continue
+            io_futures.append(io_pool.submit(upload, item))
+            extractions[io_pool.submit(_extract_and_chunk, item.pdf_bytes)] = item
+
+        batch: List[Tuple[_PendingDocument, int]] = []
+        for future in as_completed(extractions):
+            item = extractions[future]
+            try:
+                text, spans = future.result()
+                if not spans:
+                    raise ValueError(
+                        "No text chunks extracted from PDF "
+                        "(empty or scanned PDF without OCR)."
+                    )
+                update_extracted_text(
+                    user_id=user_id, document_id=item.document.id, extracted_text=text
+                )
+            except Exception as e:
+                fail(item, e)
+                continue
+
+            item.spans = spans
+            item.chunks = [text[start:end] for start, end in spans]
+            item.embeddings = [None] * len(spans)
+            item.remaining = len(spans)
+            for i in range(len(spans)):
+                batch.append((item, i))
+                if len(batch) >= settings.EMBEDDING_BATCH_SIZE:
+                    io_futures.append(io_pool.submit(embed, batch))
+                    batch = []
+
+        if batch:
+            io_futures.append(io_pool.submit(embed, batch))
+
+        for future in io_futures:
+            future.result()
@@ -0,0 +1,41 @@
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict
+
+from fastapi import Request, Response
+
+from app.db.repositories.question import CachedRead
+
+
+def _not_modified(request: Request, entry: CachedRead) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or entry.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and entry.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return entry.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_json_response(request: Request, entry: CachedRead) -> Response:
+    """
+    Serves a cached read with ETag/Last-Modified validators, answering 304
+    when the client's copy is still current.
+    """
+    headers: Dict[str, str] = {
+        "ETag": entry.etag,
+        "Cache-Control": "private, no-cache",
+    }
+    if entry.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(entry.last_modified, usegmt=True)
+
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=entry.body, media_type="application/json", headers=headers
+    )
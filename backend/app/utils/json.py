@@ -1,15 +1,34 @@
 import json
+import threading
 from typing import Any, Dict
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
 
 
 def parse_json_strict(text: str) -> Dict[str, Any]:
     return json.loads((text or "").strip())
 
 
+# Validators are built (and the schema checked) once per schema object instead
+# of on every call, as jsonschema.validate() would.
+_validators: Dict[int, Any] = {}
+_validators_lock = threading.Lock()
+
+
+def get_validator(schema: Dict[str, Any]) -> Any:
+    validator = _validators.get(id(schema))
+    if validator is None:
+        from jsonschema.validators import validator_for
+
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        validator = cls(schema)
+        with _validators_lock:
+            _validators[id(schema)] = validator
+    return validator
+
+
 def validate_or_raise(data: Dict[str, Any], schema: Dict[str, Any]) -> None:
-    try:
-        validate(instance=data, schema=schema)
-    except ValidationError as e:
-        raise ValueError(f"Schema validation failed: {e.message}") from e
+    from jsonschema.exceptions import best_match
+
+    error = best_match(get_validator(schema).iter_errors(data))
+    if error is not None:
+        raise ValueError(f"Schema validation failed: {error.message}")
@@ -1,8 +1,14 @@
-from typing import List
-import fitz  # PyMuPDF
+import re
+from typing import List, Tuple
+
+# Page objects in the raw file. Pages inside compressed object streams are
+# not visible, so this only ever under-counts.
+_PAGE_MARKER = re.compile(rb"/Type\s*/Page(?![s\w])")
 
 
 def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    import fitz  # PyMuPDF
+
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     parts: List[str] = []
     for page in doc:
@@ -10,22 +16,58 @@ def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
     return "\n".join(parts).strip()
 
 
-def chunk_text(text: str, chunk_size: int = 3500, overlap: int = 400) -> List[str]:
-    text = (text or "").strip()
-    if not text:
-        return []
+def extract_text_partial(
+    pdf_bytes: bytes, max_pages: int, max_chars: int
+) -> Tuple[str, bool]:
+    """
+    Extracts at most `max_pages` pages and about `max_chars` characters.
+    Returns (text, truncated).
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    parts: List[str] = []
+    size = 0
+    truncated = doc.page_count > max_pages
+    for page in doc.pages(0, min(doc.page_count, max_pages)):
+        text = str(page.get_text("text") or "")
+        parts.append(text)
+        size += len(text)
+        if size >= max_chars:
+            truncated = True
+            break
+    return "\n".join(parts).strip()[:max_chars], truncated
 
-    chunks: List[str] = []
+
+def count_page_markers(pdf_bytes: bytes) -> int:
+    return len(_PAGE_MARKER.findall(pdf_bytes))
+
+
+def chunk_spans(
+    text: str, chunk_size: int = 3500, overlap: int = 400
+) -> List[Tuple[int, int]]:
+    """
+    (start, end) offsets into `text` of overlapping chunks, each trimmed of
+    surrounding whitespace; text[start:end] is the chunk.
+    """
+    spans: List[Tuple[int, int]] = []
     start = 0
-    n = len(text)
+    n = len(text or "")
 
     while start < n:
         end = min(start + chunk_size, n)
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
+        piece = text[start:end]
+        stripped = piece.strip()
+        if stripped:
+            lead = len(piece) - len(piece.lstrip())
+            spans.append((start + lead, start + lead + len(stripped)))
         if end == n:
             break
         start = max(0, end - overlap)
 
-    return chunks
+    return spans
+
+
+def chunk_text(text: str, chunk_size: int = 3500, overlap: int = 400) -> List[str]:
+    text = (text or "").strip()
+    return [text[s:e] for s, e in chunk_spans(text, chunk_size, overlap)]
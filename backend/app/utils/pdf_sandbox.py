@@ -0,0 +1,174 @@
+"""
+PDF extraction in a pool of resource-limited subprocesses, so a hostile or
+pathological upload can only take down a disposable worker.
+"""
+
+import multiprocessing
+import queue
+from typing import Any, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.utils.pdf import count_page_markers, extract_text_partial
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class PdfRejected(ValueError):
+    """The upload is refused without (or after aborting) extraction."""
+
+
+def check_pdf_limits(pdf_bytes: bytes) -> None:
+    """Cheap checks on the raw bytes, before any parsing."""
+    if not pdf_bytes.lstrip()[:5] == b"%PDF-":
+        raise PdfRejected("File is not a PDF.")
+    if len(pdf_bytes) > settings.PDF_MAX_BYTES:
+        raise PdfRejected(
+            f"PDF is larger than {settings.PDF_MAX_BYTES // (1024 * 1024)} MB."
+        )
+    if count_page_markers(pdf_bytes) > settings.PDF_REJECT_PAGES:
+        raise PdfRejected(f"PDF has more than {settings.PDF_REJECT_PAGES} pages.")
+
+
+def _limit_memory(memory_bytes: int) -> None:
+    if resource is not None and memory_bytes > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def _extract(pdf_bytes: bytes, max_pages: int, max_chars: int, cpu_seconds: int):
+    # RLIMIT_CPU counts the whole life of the worker; move the soft limit so
+    # each document gets its own allowance. Exceeding it kills the worker.
+    if resource is not None and cpu_seconds > 0:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = int(usage.ru_utime + usage.ru_stime)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_seconds, hard))
+    return extract_text_partial(pdf_bytes, max_pages=max_pages, max_chars=max_chars)
+
+
+def _serve(conn, memory_bytes: int) -> None:
+    """Worker loop: one extraction at a time, results as ("ok" | error kind, value)."""
+    _limit_memory(memory_bytes)
+    conn.send(("ready", None))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        try:
+            result: Tuple[str, Any] = ("ok", _extract(*task))
+        except MemoryError:
+            result = ("memory", None)
+        except RuntimeError as e:
+            result = ("unreadable", str(e))
+        except Exception as e:
+            result = ("error", f"{type(e).__name__}: {e}")
+        conn.send(result)
+
+
+class _Worker:
+    def __init__(self):
+        # spawn: forking a threaded server process is not safe.
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_serve,
+            args=(child, settings.PDF_EXTRACTION_MEMORY_MB * 1024 * 1024),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.tasks = 0
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ExtractionPool:
+    """
+    PDF_EXTRACTION_WORKERS long-lived worker processes, each running one
+    extraction at a time over its own pipe. A caller first waits for an idle
+    worker, so the timeout only covers its own extraction, and a worker that
+    times out or dies is replaced without touching the others. Workers are
+    recycled after PDF_EXTRACTION_TASKS_PER_WORKER documents.
+    """
+
+    def __init__(self):
+        self._idle: queue.Queue = queue.Queue()
+        for _ in range(settings.PDF_EXTRACTION_WORKERS):
+            self._idle.put(None)  # started on first use
+
+    def _start(self) -> _Worker:
+        worker = _Worker()
+        # Startup (spawn + imports) is not charged to the first document.
+        if not worker.conn.poll(settings.PDF_EXTRACTION_TIMEOUT_SECONDS):
+            worker.kill()
+            raise PdfRejected("PDF extraction worker failed to start.")
+        worker.conn.recv()
+        return worker
+
+    def extract(self, pdf_bytes: bytes) -> str:
+        """
+        Text of the first PDF_MAX_PAGES pages (up to PDF_MAX_TEXT_CHARS).
+        Callers run check_pdf_limits first. Raises PdfRejected when the limits
+        are hit or the worker dies.
+        """
+        worker: Optional[_Worker] = self._idle.get()
+        try:
+            if worker is None or not worker.process.is_alive():
+                worker = self._start()
+            try:
+                worker.conn.send(
+                    (
+                        pdf_bytes,
+                        settings.PDF_MAX_PAGES,
+                        settings.PDF_MAX_TEXT_CHARS,
+                        settings.PDF_EXTRACTION_CPU_SECONDS,
+                    )
+                )
+                if not worker.conn.poll(settings.PDF_EXTRACTION_TIMEOUT_SECONDS):
+                    worker.kill()
+                    worker = None
+                    raise PdfRejected("PDF extraction timed out.")
+                kind, value = worker.conn.recv()
+            except (EOFError, OSError):
+                # Killed by a CPU or memory limit while on this document.
+                worker.kill()
+                worker = None
+                raise PdfRejected("PDF extraction exceeded its resource limits.")
+
+            worker.tasks += 1
+            if worker.tasks >= settings.PDF_EXTRACTION_TASKS_PER_WORKER:
+                worker.kill()
+                worker = None
+        finally:
+            self._idle.put(worker)
+
+        if kind == "memory":
+            raise PdfRejected("PDF extraction exceeded its memory limit.")
+        if kind == "unreadable":
+            # MuPDF reports unreadable files and failed allocations alike.
+            raise PdfRejected(f"PDF could not be read: {value}")
+        if kind == "error":
+            logger.error(f"PDF extraction failed: {value}")
+            raise PdfRejected("PDF extraction failed.")
+
+        text, truncated = value
+        if truncated:
+            logger.warning(
+                f"PDF truncated to {settings.PDF_MAX_PAGES} pages / "
+                f"{settings.PDF_MAX_TEXT_CHARS} chars"
+            )
+        return text
+
+
+extraction_pool = ExtractionPool()
+
+
+def extract_pdf_text(pdf_bytes: bytes) -> str:
+    return extraction_pool.extract(pdf_bytes)
@@ -0,0 +1,17 @@
+import os
+import sqlite3
+
+
+def connect_local_db(path: str, timeout: float = 5.0) -> sqlite3.Connection:
+    """
+    Opens a SQLite file shared by every worker process on this host.
+    WAL lets readers proceed while another worker holds the write lock.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    conn.execute("pragma journal_mode=wal")
+    conn.execute("pragma synchronous=normal")
+    return conn
@@ -1,4 +1,8 @@
-from app.db.client import get_supabase_client, get_supabase_storage_client
+from app.db.client import (
+    get_supabase_client,
+    get_supabase_storage_client,
+    supabase_dependency,
+)
 
 
 def upload_pdf_bytes(
@@ -9,12 +13,17 @@ def upload_pdf_bytes(
     content_type: str = "application/pdf",
 ) -> str:
     sb = get_supabase_storage_client()
-    sb.storage.from_(bucket).upload(
-        path=path,
-        file=content,
-        file_options={
-            "content-type": content_type,
-        },
+    # A repeated upload to the same path conflicts, so only unsent requests
+    # are retried.
+    supabase_dependency.call(
+        lambda: sb.storage.from_(bucket).upload(
+            path=path,
+            file=content,
+            file_options={
+                "content-type": content_type,
+            },
+        ),
+        idempotent=False,
     )
 
     return f"{bucket}/{path}"
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Vector = Union[Sequence[float], "np.ndarray"]
+
+
+def vector_literal(values: Vector) -> str:
+    """
+    pgvector text literal ("[0.02158,-0.01878,...]") at float16 precision,
+    which is what halfvec columns store. Five significant digits round-trip
+    every float16 exactly; the result is less than half the size of a JSON
+    list of Python floats and is accepted wherever PostgREST expects a vector.
+    """
+    import numpy as np
+
+    halves = np.asarray(values, dtype=np.float16).tolist()
+    return "[" + ",".join([f"{x:.5g}" for x in halves]) + "]"
@@ -0,0 +1,86 @@
+"""
+Import-time budget for `app.main`.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and
+fails (exit 1) when the median cumulative import time exceeds the budget or
+when a module that must stay lazy (loaded in the startup warm-up or on first
+use) is imported at module load.
+
+Run from backend/:
+    python -m benchmarks.import_time [--budget-ms 900] [--runs 5]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, Set, Tuple
+
+DEFAULT_BUDGET_MS = 900
+LAZY_MODULES = {"openai", "supabase", "fitz", "numpy", "jsonschema", "tiktoken"}
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def _measure() -> Tuple[int, Set[str], Dict[str, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    top_level: Set[str] = set()
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cum_us, name = int(m.group(2)), m.group(4)
+        top_level.add(name.split(".", 1)[0])
+        cumulative[name] = cum_us
+        if name == "app.main":
+            total_us = cum_us
+    return total_us, top_level, cumulative
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    totals = []
+    loaded: Set[str] = set()
+    cumulative: Dict[str, int] = {}
+    for _ in range(args.runs):
+        total_us, top_level, cumulative = _measure()
+        totals.append(total_us / 1000)
+        loaded |= top_level
+
+    median_ms = statistics.median(totals)
+    print(f"import app.main: median {median_ms:.0f} ms over {args.runs} runs")
+    print("slowest app modules (cumulative, last run):")
+    app_modules = sorted(
+        ((us, name) for name, us in cumulative.items() if name.startswith("app.")),
+        reverse=True,
+    )
+    for us, name in app_modules[:10]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = sorted(LAZY_MODULES & loaded)
+    if eager:
+        print(f"FAIL: imported at module load: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print(f"OK: within the {args.budget_ms:.0f} ms budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Serialization cost of a 50-question generation response.
+
+before: validate every row into GeneratedQuestion, re-validate through the
+        route's response_model, dump to JSON-able Python, then json.dumps
+        (what FastAPI does for a returned model with response_model set).
+after:  model_construct from the trusted DB rows, rendered by orjson.
+
+Run from backend/:
+    python -m benchmarks.serialization
+"""
+
+import json
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+from pydantic import TypeAdapter
+
+from app.api.responses import QuestJSONResponse
+from app.schemas.document import DocumentGenerateResponse, GeneratedQuestion
+
+N_QUESTIONS = 50
+ROUNDS = 200
+
+
+def _rows(n: int):
+    session_id = str(uuid.uuid4())
+    document_id = str(uuid.uuid4())
+    user_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    return session_id, document_id, [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "session_id": session_id,
+            "document_id": document_id,
+            "source_type": "document",
+            "question_type": "mcq",
+            "question_text": f"Question {i}: which statement about the topic is true?",
+            "options": {k: f"Option {k} for question {i}" for k in "ABCD"},
+            "correct_answer": "B",
+            "explanation": "Step 1: recall the definition. " * 20,
+            "tags": {"topic": "biology", "difficulty": "medium"},
+            "confidence_score": 0.9,
+            "created_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+def _normalized(body: bytes):
+    # pydantic writes UTC as "Z", PostgREST rows carry "+00:00"; same instant.
+    data = json.loads(body)
+    for q in data["questions"]:
+        q["created_at"] = datetime.fromisoformat(q["created_at"])
+    return data
+
+
+def main() -> None:
+    session_id, document_id, rows = _rows(N_QUESTIONS)
+    adapter = TypeAdapter(DocumentGenerateResponse)
+
+    def before() -> bytes:
+        resp = DocumentGenerateResponse(
+            session_id=session_id,
+            document_id=document_id,
+            questions=[GeneratedQuestion(**r) for r in rows],
+        )
+        validated = adapter.validate_python(resp)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+
+    def after() -> bytes:
+        resp = DocumentGenerateResponse.model_construct(
+            session_id=session_id,
+            document_id=document_id,
+            questions=[GeneratedQuestion.model_construct(**r) for r in rows],
+        )
+        return QuestJSONResponse(resp).body
+
+    assert _normalized(before()) == _normalized(after())
+
+    for name, fn in (("before", before), ("after", after)):
+        best = min(timeit.repeat(fn, number=ROUNDS, repeat=5)) / ROUNDS
+        print(f"{name:>6}: {best * 1e6:8.1f} us per {N_QUESTIONS}-question response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Embedding storage formats: float32 vector vs halfvec vs binary-quantized
+candidates re-ranked on halfvec.
+
+Always measured (NumPy, no database):
+  - insert bandwidth: bytes and encode time of a JSON list of Python floats
+    vs the float16 pgvector literal the repositories now send;
+  - recall@k against exact float32 cosine search for halfvec and for binary
+    candidates (k x factor by Hamming distance) re-ranked on halfvec.
+
+With --dsn (needs `pip install "psycopg[binary]"` and pgvector >= 0.7), the
+same corpus is loaded into scratch tables to measure table + index size,
+insert payload and query latency/recall through the HNSW indexes. The
+tables are dropped afterwards.
+
+--dims 256,512 also compares Matryoshka-truncated embeddings (first n
+dimensions, re-normalized, as EMBEDDING_DIM=n returns them) against the
+full-size exact results, and repeats the database run at each size.
+
+Synthetic clustered vectors stand in for embeddings; pass --vectors with a
+.npy array of real embeddings (rows) for representative recall numbers.
+Truncation is only meaningful for real embeddings from a Matryoshka model
+(text-embedding-3-*): synthetic dimensions are all equally informative.
+
+Run from backend/:
+    python -m benchmarks.vector_storage [--rows 20000] [--queries 200] [--k 10]
+        [--dims 256,512] [--vectors embeddings.npy] [--dsn postgresql://...]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from app.utils.vector import vector_literal
+
+RERANK_FACTORS = (2, 4, 8, 16, 32)
+
+
+def _corpus(
+    rows: int, queries: int, dim: int, seed: int = 7
+) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(8, rows // 200), dim)).astype(np.float32)
+    scale = rng.uniform(0.2, 1.0, dim).astype(np.float32)
+
+    def sample(n: int) -> np.ndarray:
+        picks = centers[rng.integers(0, len(centers), n)]
+        noise = rng.standard_normal((n, dim)).astype(np.float32) * scale
+        return picks + 0.8 * noise
+
+    return sample(rows), sample(queries)
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, idx, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def bench_wire(corpus: np.ndarray, batch: int = 64) -> None:
+    rows = corpus[:batch]
+    encoders: Dict[str, Callable[[], List[str]]] = {
+        "json floats": lambda: [
+            json.dumps(r, separators=(",", ":")) for r in rows.tolist()
+        ],
+        "f16 literal": lambda: [vector_literal(r) for r in rows],
+    }
+    print(f"insert payload for {batch} x {corpus.shape[1]}-d embeddings:")
+    for name, encode in encoders.items():
+        start = time.perf_counter()
+        encoded = encode()
+        elapsed = time.perf_counter() - start
+        size = sum(len(s) for s in encoded)
+        print(f"  {name:>12}: {size / 1024:8.1f} KiB  {elapsed * 1000:6.1f} ms")
+
+
+def bench_recall(corpus: np.ndarray, queries: np.ndarray, k: int) -> None:
+    base = _normalize(corpus)
+    q = _normalize(queries)
+    truth = _top_k(q @ base.T, k)
+
+    half = base.astype(np.float16)
+    q_half = q.astype(np.float16)
+    start = time.perf_counter()
+    found = _top_k(q_half.astype(np.float32) @ half.astype(np.float32).T, k)
+    half_ms = (time.perf_counter() - start) * 1000 / len(q)
+    print(f"recall@{k} vs float32 exact ({len(base)} rows, {len(q)} queries):")
+    print(f"  {'halfvec':>14}: {_recall(found, truth):.4f}  {half_ms:6.2f} ms/query")
+
+    bits = np.packbits(base > 0, axis=1)
+    q_bits = np.packbits(q > 0, axis=1)
+    popcount = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(1)
+    for factor in RERANK_FACTORS:
+        start = time.perf_counter()
+        found = []
+        for qi in range(len(q)):
+            hamming = popcount[np.bitwise_xor(bits, q_bits[qi])].sum(axis=1)
+            n = min(len(base), k * factor)
+            cand = np.argpartition(hamming, n - 1)[:n]
+            scores = half[cand].astype(np.float32) @ q_half[qi].astype(np.float32)
+            found.append(cand[np.argsort(-scores)[:k]])
+        ms = (time.perf_counter() - start) * 1000 / len(q)
+        label = f"binary x{factor}"
+        print(f"  {label:>14}: {_recall(np.array(found), truth):.4f}  {ms:6.2f} ms/query")
+
+
+def _truncate(x: np.ndarray, dim: int) -> np.ndarray:
+    return _normalize(x[:, :dim])
+
+
+def bench_truncation(
+    corpus: np.ndarray, queries: np.ndarray, k: int, dims: List[int]
+) -> None:
+    truth = _top_k(_normalize(queries) @ _normalize(corpus).T, k)
+    print(f"truncated halfvec, recall@{k} vs full-size float32 exact:")
+    for dim in [corpus.shape[1], *dims]:
+        base = _truncate(corpus, dim).astype(np.float16).astype(np.float32)
+        q = _truncate(queries, dim).astype(np.float16).astype(np.float32)
+        start = time.perf_counter()
+        found = _top_k(q @ base.T, k)
+        ms = (time.perf_counter() - start) * 1000 / len(q)
+        # halfvec on disk: 8-byte header + 2 bytes per dimension.
+        row_bytes = 8 + 2 * dim
+        wire = sum(len(vector_literal(r)) for r in base[:64])
+        print(
+            f"  {dim:>5}-d: recall {_recall(found, truth):.4f}  "
+            f"{row_bytes:5d} B/row  {wire / 1024:6.1f} KiB/64 rows  "
+            f"{ms:6.2f} ms/query"
+        )
+
+
+def bench_database(dsn: str, corpus: np.ndarray, queries: np.ndarray, k: int) -> None:
+    try:
+        import psycopg
+    except ImportError:
+        print('database: skipped, install "psycopg[binary]"')
+        return
+
+    dim = corpus.shape[1]
+    base = _normalize(corpus)
+    q = _normalize(queries)
+    truth = _top_k(q @ base.T, k)
+    literals = [vector_literal(r) for r in base]
+    json_lists = [json.dumps(r, separators=(",", ":")) for r in base.tolist()]
+
+    setups = {
+        "vector": f"vector({dim})",
+        "halfvec": f"halfvec({dim})",
+    }
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        for name, col_type in setups.items():
+            table = f"bench_embeddings_{name}"
+            ops = "vector_cosine_ops" if name == "vector" else "halfvec_cosine_ops"
+            conn.execute(f"drop table if exists {table}")
+            conn.execute(
+                f"create table {table} (id int primary key, embedding {col_type})"
+            )
+            payload = json_lists if name == "vector" else literals
+            start = time.perf_counter()
+            with conn.cursor().copy(f"copy {table} (id, embedding) from stdin") as copy:
+                for i, value in enumerate(payload):
+                    copy.write_row((i, value))
+            load_s = time.perf_counter() - start
+            conn.execute(f"create index on {table} using hnsw (embedding {ops})")
+            if name == "halfvec":
+                conn.execute(
+                    f"create index on {table} using hnsw "
+                    f"((binary_quantize(embedding)::bit({dim})) bit_hamming_ops)"
+                )
+            conn.execute(f"analyze {table}")
+            size = conn.execute(f"select pg_total_relation_size('{table}')").fetchone()[0]
+            wire = sum(len(s) for s in payload)
+            print(
+                f"{name:>8}: table+indexes {size / 2**20:8.1f} MiB  "
+                f"payload {wire / 2**20:7.1f} MiB  load {load_s:5.1f} s"
+            )
+
+            modes = [(name, None)]
+            if name == "halfvec":
+                modes += [(f"binary x{f}", f) for f in RERANK_FACTORS]
+            for label, factor in modes:
+                conn.execute(f"set hnsw.ef_search = {max(40, k * (factor or 2))}")
+                if factor is None:
+                    sql = (
+                        f"select id from {table} "
+                        f"order by embedding <=> %s::{col_type} limit {k}"
+                    )
+                else:
+                    sql = (
+                        f"select id from (select id, embedding from {table} "
+                        f"order by binary_quantize(embedding)::bit({dim}) "
+                        f"<~> binary_quantize(%s::{col_type}) limit {k * factor}) c "
+                        f"order by embedding <=> %s::{col_type} limit {k}"
+                    )
+                latencies, found = [], []
+                for qi in range(len(q)):
+                    lit = vector_literal(q[qi])
+                    params = (lit,) if factor is None else (lit, lit)
+                    start = time.perf_counter()
+                    rows = conn.execute(sql, params).fetchall()
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    found.append([r[0] for r in rows] + [-1] * (k - len(rows)))
+                p50 = statistics.median(latencies)
+                p95 = sorted(latencies)[int(len(latencies) * 0.95)]
+                print(
+                    f"  {label:>14}: recall@{k} {_recall(np.array(found), truth):.4f}  "
+                    f"p50 {p50:6.2f} ms  p95 {p95:6.2f} ms"
+                )
+            conn.execute(f"drop table {table}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--dims", default="", help="comma-separated truncated sizes, e.g. 256,512"
+    )
+    parser.add_argument("--vectors", help=".npy file of real embeddings (rows)")
+    parser.add_argument("--dsn", help="Postgres DSN with pgvector, for table sizes")
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = np.load(args.vectors).astype(np.float32)
+        rng = np.random.default_rng(7)
+        picks = rng.permutation(len(data))
+        queries = data[picks[: args.queries]]
+        corpus = data[picks[args.queries :]]
+    else:
+        corpus, queries = _corpus(args.rows, args.queries, args.dim)
+
+    dims = [int(d) for d in args.dims.split(",") if d.strip()]
+    bench_wire(corpus)
+    bench_recall(corpus, queries, args.k)
+    if dims:
+        bench_truncation(corpus, queries, args.k, dims)
+    if args.dsn:
+        for dim in [corpus.shape[1], *dims]:
+            print(f"database, {dim}-d:")
+            bench_database(
+                args.dsn, _truncate(corpus, dim), _truncate(queries, dim), args.k
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Dependency,
+    DependencyUnavailable,
+    RetryBudget,
+)
+
+
+class Transient(Exception):
+    pass
+
+
+class Unsent(Transient):
+    pass
+
+
+class Failing:
+    """Callable that raises the queued errors in order, then returns 'ok'."""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture(autouse=True)
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(settings, "RESILIENCE_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "RESILIENCE_BACKOFF_BASE_SECONDS", 0)
+    monkeypatch.setattr(settings, "RESILIENCE_BACKOFF_MAX_SECONDS", 0)
+    monkeypatch.setattr(settings, "RETRY_BUDGET_RATIO", 1)
+    monkeypatch.setattr(settings, "RETRY_BUDGET_MAX_TOKENS", 100)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_SECONDS", 30)
+
+
+def _dependency(failure_threshold: int = 2) -> Dependency:
+    dep = Dependency(
+        "test",
+        is_transient=lambda e: isinstance(e, Transient),
+        is_unsent=lambda e: isinstance(e, Unsent),
+    )
+    dep.breaker.failure_threshold = failure_threshold
+    return dep
+
+
+def _expire(breaker: CircuitBreaker) -> None:
+    breaker._opened_at = time.monotonic() - breaker.reset_seconds
+
+
+def test_breaker_opens_then_lets_one_probe_through():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    _expire(breaker)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    _expire(breaker)
+    breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_persistent_transient_failure_opens_circuit():
+    dep = _dependency()
+    fn = Failing(*[Transient("down")] * 10)
+
+    with pytest.raises(DependencyUnavailable):
+        dep.call(fn)
+    assert dep.breaker.state == "open"
+    calls = fn.calls
+
+    with pytest.raises(CircuitOpenError):
+        dep.call(fn)
+    assert fn.calls == calls
+
+
+def test_transient_failure_is_retried():
+    dep = _dependency()
+    fn = Failing(Transient("blip"))
+    assert dep.call(fn) == "ok"
+    assert fn.calls == 2
+    assert dep.breaker.state == "closed"
+
+
+def test_non_transient_errors_do_not_retry_or_trip():
+    dep = _dependency()
+    fn = Failing(*[ValueError("bad request")] * 5)
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            dep.call(fn)
+    assert fn.calls == 5
+    assert dep.breaker.state == "closed"
+
+
+def test_retry_budget_runs_out():
+    budget = RetryBudget(ratio=0.5, max_tokens=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_exhausted_budget_stops_retries():
+    dep = _dependency(failure_threshold=10)
+    dep.budget = RetryBudget(ratio=0, max_tokens=1)
+
+    first = Failing(Transient("a"), Transient("b"))
+    with pytest.raises(DependencyUnavailable):
+        dep.call(first)
+    assert first.calls == 2
+
+    second = Failing(Transient("c"))
+    with pytest.raises(DependencyUnavailable):
+        dep.call(second)
+    assert second.calls == 1
+
+
+def test_non_idempotent_call_retries_only_unsent_errors():
+    dep = _dependency(failure_threshold=10)
+
+    sent = Failing(Transient("timeout after send"))
+    with pytest.raises(DependencyUnavailable):
+        dep.call(sent, idempotent=False)
+    assert sent.calls == 1
+
+    unsent = Failing(Unsent("connect refused"))
+    assert dep.call(unsent, idempotent=False) == "ok"
+    assert unsent.calls == 2
+
+
+def test_deadline_stops_retries():
+    dep = _dependency()
+
+    def slow():
+        time.sleep(0.05)
+        raise Transient("slow")
+
+    calls = []
+    with pytest.raises(DependencyUnavailable):
+        dep.call(lambda: calls.append(1) or slow(), deadline=0.01)
+    assert len(calls) == 1